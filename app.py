@@ -6,8 +6,12 @@ from datetime import datetime
 from utils.pdf_processor import PDFProcessor
 from utils.llm_integration import LLMIntegration
 from utils.text_humanizer import TextHumanizer
+from utils.instructions import REPLACE, HIGHLIGHT
+from utils.edit_pipeline import EditPipeline
+from utils.blob_store import get_blob_store
+from utils.llm_providers import get_provider_class
+from utils.cmap_cache import install_cmap_cache
 from config import Config
-import base64
 
 # Page configuration
 st.set_page_config(
@@ -17,16 +21,33 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-def get_binary_file_downloader_html(bin_file, file_label='File'):
-    """Generate a download link for binary files"""
+if Config().CMAP_CACHE:
+    install_cmap_cache()
+
+def hold_blob(store, key, digest):
+    """Keep this session's reference to a blob under key, releasing the one it replaces"""
+    previous = st.session_state.get(key)
+    st.session_state[key] = digest
+    if previous is not None:
+        store.release(previous)
+
+def stored_upload(store, uploaded_file):
+    """Path of the upload in the blob store, writing it only when a new file arrives"""
+    if st.session_state.get('upload_id') != uploaded_file.file_id or store.path(st.session_state['upload_digest']) is None:
+        # getvalue() hands back the upload's own bytes; getbuffer() would force a copy
+        hold_blob(store, 'upload_digest', store.put_bytes(uploaded_file.getvalue()))
+        st.session_state['upload_id'] = uploaded_file.file_id
+    return store.path(st.session_state['upload_digest'])
+
+def humanize_replacement(llm_integration, op):
+    """Humanize a REPLACE operation's new text, keeping it as is if that fails"""
+    if op.kind != REPLACE:
+        return op
     try:
-        with open(bin_file, 'rb') as f:
-            data = f.read()
-        bin_str = base64.b64encode(data).decode()
-        href = f'<a href="data:application/octet-stream;base64,{bin_str}" download="{os.path.basename(bin_file)}">Download {file_label}</a>'
-        return href
+        return op._replace(replacement=llm_integration.humanize_text(op.replacement))
     except Exception as e:
-        return f"Error creating download link: {str(e)}"
+        st.warning(f"Could not humanize replacement: {e}")
+        return op
 
 def main():
     st.title("📝 Intelligent PDF Editor with Hugging Face")
@@ -36,10 +57,9 @@ def main():
     try:
         config = Config()
         pdf_processor = PDFProcessor()
-        
-        # Create directories if they don't exist
-        os.makedirs(config.UPLOAD_FOLDER, exist_ok=True)
-        os.makedirs(config.OUTPUT_FOLDER, exist_ok=True)
+        blob_store = get_blob_store()
+        # Only the hosted API needs a key; a local server is used as configured
+        requires_api_key = get_provider_class(config.LLM_PROVIDER).requires_api_key
         
     except Exception as e:
         st.error(f"Initialization error: {e}")
@@ -47,36 +67,37 @@ def main():
     
     # API Key input in sidebar
     with st.sidebar:
-        st.header("🔑 Hugging Face API Setup")
-        api_key = st.text_input(
-            "Hugging Face API Key:",
-            type="password",
-            value=config.HUGGINGFACE_API_KEY or "",
-            help="Get your free API key from https://huggingface.co/settings/tokens"
-        )
-        
-        if api_key:
-            os.environ['HUGGINGFACE_API_KEY'] = api_key
+        if requires_api_key:
+            st.header("🔑 Hugging Face API Setup")
+            api_key = st.text_input(
+                "Hugging Face API Key:",
+                type="password",
+                value=config.HUGGINGFACE_API_KEY or "",
+                help="Get your free API key from https://huggingface.co/settings/tokens"
+            )
+            
+            if api_key:
+                os.environ['HUGGINGFACE_API_KEY'] = api_key
+        else:
+            api_key = None
+            st.header("🖥️ Local Inference")
+            st.caption(f"Using the {config.LOCAL_LLM_API} server at {config.LOCAL_LLM_URL}")
         
         st.header("📄 Upload PDF")
         uploaded_file = st.file_uploader("Choose a PDF file", type="pdf")
         
         if uploaded_file:
-            # Save uploaded file
-            file_path = os.path.join(config.UPLOAD_FOLDER, uploaded_file.name)
-            try:
-                with open(file_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-                st.success(f"Uploaded: {uploaded_file.name}")
-                
-            except Exception as e:
-                st.error(f"Error saving file: {e}")
+            st.success(f"Uploaded: {uploaded_file.name}")
+        elif st.session_state.get('upload_digest'):
+            hold_blob(blob_store, 'upload_digest', None)
+            hold_blob(blob_store, 'output_digest', None)
+            st.session_state['upload_id'] = None
     
     # Main content area
     if uploaded_file:
         st.header("Modify Your PDF")
         
-        if not api_key:
+        if requires_api_key and not api_key:
             st.warning("⚠️ Please enter your Hugging Face API key in the sidebar to use AI features")
         
         # Prompt input
@@ -94,66 +115,86 @@ def main():
                 st.error("Please enter a modification prompt")
                 return
             
-            if not api_key:
+            if requires_api_key and not api_key:
                 st.error("Please enter your Hugging Face API key")
                 return
             
             try:
                 with st.spinner("Processing your request..."):
-                    file_path = os.path.join(config.UPLOAD_FOLDER, uploaded_file.name)
+                    # Identical uploads share one blob, which the backends memory-map
+                    pdf_source = stored_upload(blob_store, uploaded_file)
+                    # The blob's name is the SHA-256 the caches key on, so the upload is never hashed again
+                    file_hash = st.session_state['upload_digest']
                     output_filename = f"modified_{uploaded_file.name}"
-                    output_path = os.path.join(config.OUTPUT_FOLDER, output_filename)
+                    output_path = blob_store.temp_path()
                     
                     # Initialize LLM integration
                     llm_integration = LLMIntegration()
                     
-                    # Extract text for context
-                    context_text = pdf_processor.extract_full_text(file_path)
-                    
-                    # Generate modification instructions using Hugging Face
-                    modification_prompt = f"""
-                    Analyze this PDF content and provide specific instructions for modification based on: {prompt}
-                    
-                    Return instructions in this format:
-                    REPLACE: [old_text] -> [new_text]
-                    HIGHLIGHT: [text_to_highlight]
-                    """
-                    
-                    instructions = llm_integration.generate_text(modification_prompt, context_text)
-                    st.text_area("AI Instructions", instructions, height=150)
+                    # Each instruction line is located and staged on the open document as soon as it
+                    # is complete, so the output can be written right after the last token
+                    pipeline = EditPipeline(
+                        pdf_processor, pdf_source, output_path,
+                        prepare=(lambda op: humanize_replacement(llm_integration, op)) if humanize_text else None,
+                        file_hash=file_hash
+                    )
+                    try:
+                        # Generate modification instructions using Hugging Face
+                        instructions_view = st.empty()
+                        if config.PLANNER_MAP_REDUCE:
+                            # One request per page window, run concurrently, then merged
+                            instructions, failed_windows, trimmed_windows = llm_integration.plan_edits(
+                                prompt, pdf_processor.iter_pages(pdf_source, file_hash=file_hash)
+                            )
+                            if failed_windows:
+                                st.warning(f"{failed_windows} page window(s) could not be planned and were skipped")
+                            if trimmed_windows:
+                                st.info(f"{trimmed_windows} page window(s) were trimmed to fit the model's context window")
+                            pipeline.feed(instructions)
+                        else:
+                            # Send only the passages relevant to the prompt, not the whole document
+                            context_text = pdf_processor.retrieve_context(pdf_source, prompt, file_hash=file_hash)
+                            chunks, packing = llm_integration.stream_instructions(prompt, context_text)
+                            if packing is not None and packing.trimmed:
+                                st.info(
+                                    f"Context trimmed to fit the model window: sent {packing.kept_tokens} of "
+                                    f"{packing.context_tokens} tokens, {packing.dropped_sections} of "
+                                    f"{packing.sections} section(s) left out"
+                                )
+                            # Show the instructions as they are generated instead of after the last token
+                            instructions = ""
+                            for chunk in chunks:
+                                instructions += chunk
+                                instructions_view.text(instructions)
+                                pipeline.feed(chunk)
+                        instructions_view.text_area("AI Instructions", instructions, height=150)
+                        results = pipeline.finish()
+                    finally:
+                        pipeline.close()
+                    hold_blob(blob_store, 'output_digest', blob_store.put_file(output_path))
                     
-                    # Parse and apply instructions
-                    for line in instructions.split('\n'):
-                        if 'REPLACE:' in line and '->' in line:
-                            try:
-                                parts = line.split('->')
-                                old_text = parts[0].replace('REPLACE:', '').strip()
-                                new_text = parts[1].strip()
-                                
-                                if humanize_text:
-                                    new_text = llm_integration.humanize_text(new_text)
-                                
-                                pdf_processor.replace_text(file_path, output_path, old_text, new_text)
-                                st.success(f"Replaced: '{old_text}' with '{new_text}'")
-                                
-                            except Exception as e:
-                                st.warning(f"Could not process replacement: {e}")
-                        
-                        elif 'HIGHLIGHT:' in line:
-                            try:
-                                text_to_highlight = line.replace('HIGHLIGHT:', '').strip()
-                                pdf_processor.highlight_text(file_path if not os.path.exists(output_path) else output_path, 
-                                                            output_path, text_to_highlight)
-                                st.success(f"Highlighted: '{text_to_highlight}'")
-                                
-                            except Exception as e:
-                                st.warning(f"Could not process highlighting: {e}")
+                    for result in results:
+                        op = result.operation
+                        if not result.matches:
+                            st.warning(f"Could not find '{op.target}' in the PDF")
+                        elif op.kind == REPLACE and result.applied:
+                            st.success(f"Replaced: '{op.target}' with '{op.replacement}'")
+                        elif op.kind == HIGHLIGHT and result.applied:
+                            st.success(f"Highlighted: '{op.target}'")
+                        else:
+                            st.warning(f"Could not apply edit to '{op.target}'")
                     
                     st.success("PDF modification completed!")
                     
-                    # Provide download link
+                    # Served as raw bytes from Streamlit's media endpoint, not a base64 data URI
                     st.markdown("### Download Modified PDF")
-                    st.markdown(get_binary_file_downloader_html(output_path, "Modified PDF"), unsafe_allow_html=True)
+                    with open(blob_store.path(st.session_state['output_digest']), 'rb') as output_file:
+                        st.download_button(
+                            "Download Modified PDF",
+                            data=output_file,
+                            file_name=output_filename,
+                            mime="application/pdf"
+                        )
                     
             except Exception as e:
                 st.error(f"Error processing PDF: {str(e)}")
@@ -185,4 +226,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-EOL
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""Compare extract, replace and highlight throughput of every PDF backend,
+and the size/time trade-off of each output optimization preset.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pdf_backends
+
+Set CMAP_CACHE=true to run pypdf with the shared CMap cache installed.
+"""
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.corpus import ensure_corpus
+from config import Config
+from utils.cmap_cache import install_cmap_cache
+from utils.instructions import parse_instructions
+from utils.pdf_processor import PDFProcessor
+from utils.pdf_backends import BACKENDS, OPTIMIZE_PRESETS
+from utils.text_cache import PageTextCache
+
+PLAN = """
+REPLACE: quarterly revenue -> annual revenue
+REPLACE: Introduction 1 -> Overview 1
+HIGHLIGHT: operating costs
+HIGHLIGHT: Section 2.3
+"""
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def current_rss_kb():
+    """Resident set size right now, falling back to the peak where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def peak_rss_mb(name, path, output_path):
+    """Peak RSS growth while one document is inspected, extracted and edited.
+
+    Runs in a fresh process with a private cache so earlier documents and
+    warm caches do not hide the cost of this one.
+    """
+    with tempfile.TemporaryDirectory() as cache_dir:
+        processor = PDFProcessor(backend=name, cache=PageTextCache(cache_dir, 16))
+        baseline = current_rss_kb()
+        processor.get_pdf_info(path)
+        for _ in processor.iter_pages(path):
+            pass
+        processor.apply_edits(path, output_path, parse_instructions(PLAN))
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux
+    return (peak - baseline) / 1024
+
+
+def isolated_peak_rss_mb(name, path, output_path):
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(peak_rss_mb, name, path, output_path).result()
+
+
+def bench_backend(name, documents, output_folder):
+    """Extract and edit throughput from a cold, private page cache.
+
+    The shared cache would already hold the corpus text from earlier runs
+    or the app, and extraction would be timed as a cache read.
+    """
+    operations = parse_instructions(PLAN)
+    replacements = [op for op in operations if op.kind == 'replace']
+    highlights = [op for op in operations if op.kind == 'highlight']
+
+    rows = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        processor = PDFProcessor(backend=name, cache=PageTextCache(cache_dir, 16))
+        for path, pages in documents:
+            output_path = os.path.join(output_folder, f"{name}_{os.path.basename(path)}")
+            rows.append((
+                os.path.basename(path),
+                pages,
+                timed(processor.extract_full_text, path),
+                timed(processor.apply_edits, path, output_path, replacements),
+                timed(processor.apply_edits, path, output_path, highlights),
+                isolated_peak_rss_mb(name, path, output_path),
+            ))
+    return rows
+
+
+def bench_optimize(name, documents, output_folder):
+    """Output size and edit time of the full plan under every optimization preset"""
+    processor = PDFProcessor(backend=name)
+    operations = parse_instructions(PLAN)
+
+    rows = []
+    for path, pages in documents:
+        matches = processor.locate(path, operations)
+        for preset in OPTIMIZE_PRESETS:
+            output_path = os.path.join(output_folder, f"{name}_{preset}_{os.path.basename(path)}")
+            elapsed = timed(processor.apply_edits, path, output_path, operations, matches, preset)
+            rows.append((
+                os.path.basename(path),
+                preset,
+                os.path.getsize(path),
+                os.path.getsize(output_path),
+                elapsed,
+            ))
+    return rows
+
+
+def main():
+    if Config().CMAP_CACHE and not install_cmap_cache():
+        print("CMAP_CACHE ignored: the installed pypdf is not the pinned release")
+    documents = ensure_corpus()
+    print(f"{'backend':<10}{'document':<14}{'pages':>6}{'extract p/s':>14}{'replace p/s':>14}"
+          f"{'highlight p/s':>16}{'peak RSS MB':>14}")
+    with tempfile.TemporaryDirectory() as output_folder:
+        for name in BACKENDS:
+            try:
+                rows = bench_backend(name, documents, output_folder)
+            except Exception as e:
+                print(f"{name:<10}skipped: {e}")
+                continue
+            for document, pages, extract, replace, highlight, rss in rows:
+                print(f"{name:<10}{document:<14}{pages:>6}"
+                      f"{pages / extract:>14.1f}{pages / replace:>14.1f}{pages / highlight:>16.1f}{rss:>14.1f}")
+
+        print()
+        print(f"{'backend':<10}{'document':<14}{'preset':<8}{'input KB':>10}{'output KB':>11}{'ratio':>8}{'edit s':>9}")
+        for name in BACKENDS:
+            try:
+                rows = bench_optimize(name, documents, output_folder)
+            except Exception as e:
+                print(f"{name:<10}skipped: {e}")
+                continue
+            for document, preset, input_size, output_size, elapsed in rows:
+                print(f"{name:<10}{document:<14}{preset:<8}{input_size / 1024:>10.1f}{output_size / 1024:>11.1f}"
+                      f"{output_size / input_size:>8.2f}{elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Latency of every LLM provider through the same LLMProvider interface:
+blocking generation, and time to first output and total when streaming.
+
+By default each provider talks to a local stub speaking its wire
+protocol, with the queueing and token timings of bench_streaming, which
+isolates client-side overhead. With --live the configured endpoints are
+used instead (HUGGINGFACE_API_KEY, LOCAL_LLM_URL, LOCAL_LLM_API). Run from
+the repository root:
+
+    python -m benchmarks.bench_providers [--live]
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.bench_streaming import (
+    QUEUE_SECONDS,
+    ROUNDS,
+    TOKEN_SECONDS,
+    StubInferenceHandler,
+    default_tokens,
+)
+from config import Config
+from utils.llm_providers import PROVIDERS, get_provider
+from utils.local_inference import LOCAL_APIS
+
+PROMPT = "Highlight every mention of operating costs"
+CONTEXT = "[Page 1]\nSection 1.0: the quarterly revenue grew while operating costs fell."
+
+
+class StubCompletionsHandler(BaseHTTPRequestHandler):
+    """Answers like an OpenAI-compatible /v1/completions endpoint"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        tokens = self.server.tokens
+        time.sleep(QUEUE_SECONDS)
+        if not payload.get('stream'):
+            time.sleep(TOKEN_SECONDS * len(tokens))
+            body = json.dumps({'choices': [{'index': 0, 'text': "".join(tokens), 'finish_reason': 'length'}]})
+            body = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i, token in enumerate(tokens):
+            event = {'choices': [{'index': 0, 'text': token, 'finish_reason': None}]}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+            if i < len(tokens) - 1:
+                time.sleep(TOKEN_SECONDS)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(handler):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.tokens = default_tokens()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stub_providers(tgi_url, openai_url):
+    """(label, provider) for every registered provider, each pointed at its stub"""
+    for name in PROVIDERS:
+        if name == 'local':
+            for api in LOCAL_APIS:
+                Config.LOCAL_LLM_API = api
+                Config.LOCAL_LLM_URL = openai_url if api == 'openai' else tgi_url
+                yield f"{name}/{api}", get_provider(name)
+        else:
+            provider = get_provider(name)
+            provider.api_url = tgi_url
+            yield name, provider
+
+
+def live_providers():
+    for name in PROVIDERS:
+        label = f"{name}/{Config.LOCAL_LLM_API}" if name == 'local' else name
+        yield label, get_provider(name)
+
+
+def bench_provider(provider):
+    """Mean (blocking total, streaming first output, streaming total) in seconds"""
+    blocking = first = streaming = 0.0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        provider.generate_text(PROMPT, CONTEXT)
+        blocking += time.perf_counter() - start
+
+        start = time.perf_counter()
+        first_output = None
+        chunks, _ = provider.generate_stream(PROMPT, CONTEXT)
+        for _ in chunks:
+            if first_output is None:
+                first_output = time.perf_counter() - start
+        first += first_output or 0.0
+        streaming += time.perf_counter() - start
+    return blocking / ROUNDS, first / ROUNDS, streaming / ROUNDS
+
+
+def main():
+    live = '--live' in sys.argv[1:]
+    # Measure the endpoints, not the response cache
+    Config.LLM_CACHE = False
+    Config.LLM_STREAMING = True
+
+    servers = []
+    if live:
+        providers = live_providers()
+    else:
+        servers = [start_stub(StubInferenceHandler), start_stub(StubCompletionsHandler)]
+        tgi_url, openai_url = (f"http://127.0.0.1:{server.server_address[1]}" for server in servers)
+        providers = stub_providers(tgi_url, openai_url)
+
+    print(f"{'provider':<16}{'blocking ms':>13}{'first output ms':>17}{'stream total ms':>17}")
+    try:
+        for label, provider in providers:
+            try:
+                blocking, first, streaming = bench_provider(provider)
+            except Exception as e:
+                print(f"{label:<16}skipped: {e}")
+                continue
+            print(f"{label:<16}{blocking * 1000:>13.1f}{first * 1000:>17.1f}{streaming * 1000:>17.1f}")
+    finally:
+        for server in servers:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Time to first visible output and total latency of blocking and streaming
+generation, against a local stub of a text-generation-inference server,
+and how long the edited PDF takes to appear after the last token when
+instructions are applied after the stream versus pipelined with it.
+
+The stub waits QUEUE_SECONDS before the first token and TOKEN_SECONDS
+between tokens, as a busy inference endpoint would. Run from the
+repository root:
+
+    python -m benchmarks.bench_streaming
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.corpus import ensure_corpus
+from utils.edit_pipeline import EditPipeline
+from utils.huggingface_integration import HuggingFaceIntegration
+from utils.instructions import parse_instructions
+from utils.pdf_backends import BACKENDS
+from utils.pdf_processor import PDFProcessor
+
+QUEUE_SECONDS = 0.5
+TOKEN_SECONDS = 0.02
+RESPONSE_TOKENS = 100
+ROUNDS = 3
+
+PROMPT = "Highlight every mention of operating costs"
+CONTEXT = "[Page 1]\nSection 1.0: the quarterly revenue grew while operating costs fell."
+
+# Instructions streamed for the apply benchmark: one rename and one highlight per page
+PLAN_PAGES = 40
+
+
+def stub_tokens(text):
+    """Split a response into word tokens, as a tokenizer streams them"""
+    return [f"{word} " for word in text.split(" ")]
+
+
+def default_tokens():
+    return stub_tokens("HIGHLIGHT: operating costs\n" * RESPONSE_TOKENS)[:RESPONSE_TOKENS]
+
+
+def plan_tokens():
+    lines = []
+    for page in range(1, PLAN_PAGES + 1):
+        lines.append(f"REPLACE: Introduction {page} -> Overview {page}\n")
+        lines.append(f"HIGHLIGHT: Section {page}.3:\n")
+    return stub_tokens("".join(lines))
+
+
+class StubInferenceHandler(BaseHTTPRequestHandler):
+    """Answers like text-generation-inference: JSON, or server-sent events when "stream" is set"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        tokens = self.server.tokens
+        time.sleep(QUEUE_SECONDS)
+        if not payload.get('stream'):
+            time.sleep(TOKEN_SECONDS * len(tokens))
+            body = json.dumps([{'generated_text': "".join(tokens)}]).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i, token in enumerate(tokens):
+            last = i == len(tokens) - 1
+            event = {
+                'token': {'id': i, 'text': token, 'logprob': 0.0, 'special': False},
+                'generated_text': "".join(tokens) if last else None,
+                'details': None,
+            }
+            self._write_chunk(f"data:{json.dumps(event)}\n\n".encode('utf-8'))
+            if not last:
+                time.sleep(TOKEN_SECONDS)
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def bench_blocking(hf):
+    start = time.perf_counter()
+    hf.generate_text(PROMPT, CONTEXT)
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+def bench_streaming(hf):
+    start = time.perf_counter()
+    first = None
+    chunks, _ = hf.generate_stream(PROMPT, CONTEXT)
+    for _ in chunks:
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def bench_apply_after(hf, processor, path, output_path):
+    """Wait for the whole response, then parse, locate and apply it"""
+    chunks, _ = hf.generate_stream(PROMPT, CONTEXT)
+    instructions = "".join(chunks)
+    last_token = time.perf_counter()
+    operations = parse_instructions(instructions)
+    processor.apply_edits(path, output_path, operations)
+    return time.perf_counter() - last_token
+
+
+def bench_pipelined(hf, processor, path, output_path):
+    """Stage each instruction line while the rest of the response is still streaming"""
+    pipeline = EditPipeline(processor, path, output_path)
+    try:
+        chunks, _ = hf.generate_stream(PROMPT, CONTEXT)
+        for chunk in chunks:
+            pipeline.feed(chunk)
+        last_token = time.perf_counter()
+        pipeline.finish()
+        return time.perf_counter() - last_token
+    finally:
+        pipeline.close()
+
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubInferenceHandler)
+    server.tokens = default_tokens()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    hf = HuggingFaceIntegration()
+    hf.api_url = f"http://127.0.0.1:{server.server_address[1]}/models/stub"
+    hf.response_cache = None
+    hf.config.LLM_STREAMING = True
+
+    print(f"{'mode':<12}{'first output ms':>17}{'total ms':>11}")
+    try:
+        for mode, bench in (('blocking', bench_blocking), ('streaming', bench_streaming)):
+            runs = [bench(hf) for _ in range(ROUNDS)]
+            first = sum(run[0] for run in runs) / ROUNDS
+            total = sum(run[1] for run in runs) / ROUNDS
+            print(f"{mode:<12}{first * 1000:>17.1f}{total * 1000:>11.1f}")
+
+        server.tokens = plan_tokens()
+        path = next(path for path, pages in ensure_corpus() if pages == 100)
+        output_path = os.path.join(tempfile.gettempdir(), "bench_streaming_output.pdf")
+        print()
+        print(f"{'backend':<10}{'mode':<14}{'after last token ms':>21}")
+        for name in BACKENDS:
+            processor = PDFProcessor(backend=name)
+            # Page texts are cached before timing, as they are once the app has seen an upload
+            for _ in processor.iter_pages(path):
+                pass
+            for mode, bench in (('apply after', bench_apply_after), ('pipelined', bench_pipelined)):
+                tail = sum(bench(hf, processor, path, output_path) for _ in range(ROUNDS)) / ROUNDS
+                print(f"{name:<10}{mode:<14}{tail * 1000:>21.1f}")
+        os.remove(output_path)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
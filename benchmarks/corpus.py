@@ -0,0 +1,41 @@
+import os
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+CORPUS_FOLDER = os.path.join('benchmarks', 'corpus')
+
+# (name, pages) documents shared by every benchmark
+DOCUMENTS = [
+    ('short.pdf', 10),
+    ('report.pdf', 100),
+    ('manual.pdf', 500),
+]
+
+LINES_PER_PAGE = 40
+
+
+def build_document(path, pages):
+    """Write a synthetic text PDF with a heading and body lines on every page"""
+    c = canvas.Canvas(path, pagesize=letter)
+    for page in range(1, pages + 1):
+        c.setFont("Helvetica-Bold", 16)
+        c.drawString(72, 720, f"Introduction {page}")
+        c.setFont("Helvetica", 11)
+        for line in range(LINES_PER_PAGE):
+            c.drawString(72, 690 - line * 15,
+                         f"Section {page}.{line}: the quarterly revenue grew while operating costs fell.")
+        c.showPage()
+    c.save()
+
+
+def ensure_corpus(folder=CORPUS_FOLDER):
+    """Generate the benchmark corpus once and return the list of (path, pages)"""
+    os.makedirs(folder, exist_ok=True)
+    documents = []
+    for name, pages in DOCUMENTS:
+        path = os.path.join(folder, name)
+        if not os.path.exists(path):
+            build_document(path, pages)
+        documents.append((path, pages))
+    return documents
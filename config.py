@@ -5,10 +5,90 @@ load_dotenv()
 
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-key-change-in-production')
-    UPLOAD_FOLDER = 'uploads'
-    OUTPUT_FOLDER = 'outputs'
+    # Content-addressed store for uploads and outputs, bounded in bytes and idle time
+    BLOB_FOLDER = os.getenv('BLOB_FOLDER', 'blobs')
+    BLOB_STORE_MAX_BYTES = int(os.getenv('BLOB_STORE_MAX_BYTES', str(1024 ** 3)))
+    BLOB_TTL_SECONDS = int(os.getenv('BLOB_TTL_SECONDS', str(24 * 3600)))
+    CACHE_FOLDER = os.getenv('CACHE_FOLDER', 'cache')
     ALLOWED_EXTENSIONS = {'pdf'}
     
+    # PDF engine: 'pymupdf' (fast, real redaction) or 'pypdf' (pure Python)
+    PDF_BACKEND = os.getenv('PDF_BACKEND', 'pymupdf')
+    
+    # Extracted page text kept in memory across reruns (entries, not bytes)
+    PAGE_CACHE_SIZE = int(os.getenv('PAGE_CACHE_SIZE', '4096'))
+    # Word position indexes kept in memory (documents); all are also persisted
+    POSITIONAL_INDEX_CACHE_SIZE = int(os.getenv('POSITIONAL_INDEX_CACHE_SIZE', '8'))
+    # Glyph width tables kept in memory (fonts), shared across documents
+    FONT_METRICS_CACHE_SIZE = int(os.getenv('FONT_METRICS_CACHE_SIZE', '256'))
+    # Opt-in: share decoded ToUnicode CMaps and encodings across pages and documents (pypdf).
+    # This patches pypdf internals, so it only takes effect on the pinned pypdf release.
+    CMAP_CACHE = os.getenv('CMAP_CACHE', 'false').lower() == 'true'
+    CMAP_CACHE_SIZE = int(os.getenv('CMAP_CACHE_SIZE', '256'))
+    
+    # Prompt context: top BM25 page/paragraph chunks within a token budget
+    RETRIEVAL_TOP_K = int(os.getenv('RETRIEVAL_TOP_K', '8'))
+    RETRIEVAL_TOKEN_BUDGET = int(os.getenv('RETRIEVAL_TOKEN_BUDGET', '1500'))
+    RETRIEVAL_CHUNK_WORDS = int(os.getenv('RETRIEVAL_CHUNK_WORDS', '120'))
+    RETRIEVAL_INDEX_CACHE_SIZE = int(os.getenv('RETRIEVAL_INDEX_CACHE_SIZE', '8'))
+    
+    # Opt-in map-reduce planning: one LLM request per page window instead of one retrieved context
+    PLANNER_MAP_REDUCE = os.getenv('PLANNER_MAP_REDUCE', 'false').lower() == 'true'
+    # Windows take pages until they fill the model's context budget; a positive value also caps their page count
+    PLANNER_WINDOW_PAGES = int(os.getenv('PLANNER_WINDOW_PAGES', '0'))
+    PLANNER_CONCURRENCY = int(os.getenv('PLANNER_CONCURRENCY', '4'))
+    
+    # Opt-in multi-process extraction for large documents
+    PARALLEL_EXTRACTION = os.getenv('PARALLEL_EXTRACTION', 'false').lower() == 'true'
+    EXTRACT_WORKERS = int(os.getenv('EXTRACT_WORKERS', str(os.cpu_count() or 1)))
+    EXTRACT_MIN_SHARD_PAGES = int(os.getenv('EXTRACT_MIN_SHARD_PAGES', '50'))
+    
+    # Append edits as an incremental update instead of rewriting the whole file
+    INCREMENTAL_SAVE = os.getenv('INCREMENTAL_SAVE', 'false').lower() == 'true'
+    # Full rewrites: 'none', 'fast' (compress edits, drop orphans) or 'small' (also dedupe and recompress all)
+    OUTPUT_OPTIMIZATION = os.getenv('OUTPUT_OPTIMIZATION', 'fast').lower()
+    
+    # Bounded-memory mode for huge files: edit and flush EDIT_WINDOW_PAGES pages at a time
+    WINDOWED_EDITS = os.getenv('WINDOWED_EDITS', 'false').lower() == 'true'
+    EDIT_WINDOW_PAGES = int(os.getenv('EDIT_WINDOW_PAGES', '50'))
+    
+    # Outgoing HTTP: one keep-alive pool per process; timeouts in seconds
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '120'))
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '4'))
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '16'))
+    
+    # Inference retries: capped exponential backoff with jitter inside an overall deadline (seconds)
+    LLM_MAX_ATTEMPTS = int(os.getenv('LLM_MAX_ATTEMPTS', '5'))
+    LLM_RETRY_BASE_DELAY = float(os.getenv('LLM_RETRY_BASE_DELAY', '1'))
+    LLM_RETRY_MAX_DELAY = float(os.getenv('LLM_RETRY_MAX_DELAY', '30'))
+    LLM_DEADLINE = float(os.getenv('LLM_DEADLINE', '180'))
+    
+    # LLM responses cached by model, parameters and prompt (memory LRU over SQLite)
+    LLM_CACHE = os.getenv('LLM_CACHE', 'true').lower() == 'true'
+    LLM_CACHE_SIZE = int(os.getenv('LLM_CACHE_SIZE', '512'))
+    LLM_CACHE_TTL_SECONDS = int(os.getenv('LLM_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+    # Greedy decoding instead of sampling, so identical requests give identical, cacheable answers
+    LLM_DETERMINISTIC = os.getenv('LLM_DETERMINISTIC', 'false').lower() == 'true'
+    # Sampled answers are only cached on request: a replayed draw stands in for a fresh one
+    LLM_CACHE_SAMPLED = os.getenv('LLM_CACHE_SAMPLED', 'false').lower() == 'true'
+    # Stream tokens as server-sent events so instructions appear while they are generated
+    LLM_STREAMING = os.getenv('LLM_STREAMING', 'true').lower() == 'true'
+    
+    # Prompt budget: the model's context window, of which LLM_MAX_NEW_TOKENS is kept for the answer.
+    # LLM_TOKENIZER is a tokenizer.json path or Hub id for exact counts (needs `tokenizers`); unset, counts are estimated
+    LLM_CONTEXT_TOKENS = int(os.getenv('LLM_CONTEXT_TOKENS', '4096'))
+    LLM_MAX_NEW_TOKENS = int(os.getenv('LLM_MAX_NEW_TOKENS', '300'))
+    LLM_TOKENIZER = os.getenv('LLM_TOKENIZER', '')
+    
+    # Inference provider: 'huggingface' (hosted Inference API) or 'local' (a server on our own hosts)
+    LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'huggingface')
+    # Local server speaking 'openai' (/v1/completions: llama.cpp, vLLM, Ollama) or 'tgi' (text-generation-inference)
+    LOCAL_LLM_URL = os.getenv('LOCAL_LLM_URL', 'http://127.0.0.1:8080')
+    LOCAL_LLM_API = os.getenv('LOCAL_LLM_API', 'openai')
+    LOCAL_LLM_MODEL = os.getenv('LOCAL_LLM_MODEL', '')
+    LOCAL_LLM_API_KEY = os.getenv('LOCAL_LLM_API_KEY')
+    
     # Hugging Face Configuration
     HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY')
     HUGGINGFACE_MODEL = os.getenv('HUGGINGFACE_MODEL', 'mistralai/Mistral-7B-Instruct-v0.1')
@@ -20,4 +100,3 @@ class Config:
     Make it sound like it was written by a human expert in the field.
     Add some natural variations in sentence length and structure.
     """
-EOL
\ No newline at end of file
@@ -0,0 +1,50 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from benchmarks.corpus import build_document
+
+
+@pytest.fixture(scope='session')
+def sample_pdf(tmp_path_factory):
+    """Three pages laid out like the benchmark corpus"""
+    path = tmp_path_factory.mktemp('corpus') / 'sample.pdf'
+    build_document(str(path), 3)
+    return str(path)
+
+
+class StubInferenceHandler(BaseHTTPRequestHandler):
+    """Records each request and answers with the server's canned reply, one HTTP chunk per piece"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append((self.path, dict(self.headers), json.loads(body)))
+        content_type, pieces = self.server.reply
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for piece in pieces + [b""]:
+            self.wfile.write(f"{len(piece):x}\r\n".encode('ascii') + piece + b"\r\n")
+            self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def inference_server():
+    """Local HTTP server standing in for an inference endpoint; set .reply to (content type, [bytes])"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubInferenceHandler)
+    server.requests = []
+    server.reply = ('application/json', [b'[{"generated_text": ""}]'])
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
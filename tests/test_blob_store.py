@@ -0,0 +1,83 @@
+import os
+import time
+
+from utils.blob_store import BlobStore
+
+BLOB_SIZE = 100
+
+
+def blob(fill):
+    return bytes([fill]) * BLOB_SIZE
+
+
+def age(store, digest, seconds):
+    """Backdate a blob's last access on disk"""
+    path = store._path(digest)
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = BlobStore(str(tmp_path), 10 * BLOB_SIZE, 3600)
+    assert store.put_bytes(blob(1)) == store.put_bytes(blob(1))
+    assert store.stats()['blobs'] == 1
+    assert store.stats()['bytes'] == BLOB_SIZE
+
+
+def test_quota_evicts_least_recently_used_unreferenced_blobs(tmp_path):
+    store = BlobStore(str(tmp_path), int(2.5 * BLOB_SIZE), 3600)
+    first = store.put_bytes(blob(1))
+    store.release(first)
+    time.sleep(0.01)
+    second = store.put_bytes(blob(2))
+    store.release(second)
+    time.sleep(0.01)
+    # Reading the first blob makes the second the least recently used
+    assert store.path(first) is not None
+    time.sleep(0.01)
+    third = store.put_bytes(blob(3))
+
+    assert store.path(second) is None
+    assert store.path(first) is not None
+    assert store.path(third) is not None
+    assert store.stats()['bytes'] <= store.max_bytes
+
+
+def test_referenced_blobs_outlive_the_quota(tmp_path):
+    store = BlobStore(str(tmp_path), BLOB_SIZE, 3600)
+    first = store.put_bytes(blob(1))
+    second = store.put_bytes(blob(2))
+    assert store.path(first) is not None
+    assert store.path(second) is not None
+
+    store.release(first)
+    assert store.path(first) is None
+    assert store.path(second) is not None
+
+
+def test_idle_blobs_expire_even_when_referenced(tmp_path):
+    store = BlobStore(str(tmp_path), 10 * BLOB_SIZE, 60)
+    digest = store.put_bytes(blob(1))
+    age(store, digest, 120)
+
+    # A fresh process scans access times from disk; the reference never released does not pin it
+    restarted = BlobStore(str(tmp_path), 10 * BLOB_SIZE, 60)
+    restarted.acquire(digest)
+    restarted.evict()
+    assert restarted.path(digest) is None
+    assert restarted.stats()['evictions'] == 1
+
+
+def test_abandoned_scratch_files_expire(tmp_path):
+    store = BlobStore(str(tmp_path), 10 * BLOB_SIZE, 60)
+    stale = store.temp_path()
+    fresh = store.temp_path() + '.fresh'
+    for path in (stale, fresh):
+        with open(path, 'wb') as file:
+            file.write(b'partial')
+    past = time.time() - 120
+    os.utime(stale, (past, past))
+
+    store.evict()
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh)
@@ -0,0 +1,44 @@
+import pypdf
+import pytest
+from pypdf import PdfReader
+from pypdf import _cmap
+from pypdf.generic import _font
+
+from utils import cmap_cache
+from utils.cmap_cache import CMapCache, install_cmap_cache
+from utils.pdf_backends import PyPDFBackend
+
+
+@pytest.fixture
+def unpatched(monkeypatch):
+    """pypdf as imported, restored after the test whatever install_cmap_cache() did"""
+    for module in (_cmap, _font):
+        monkeypatch.setattr(module, 'get_encoding', cmap_cache._original_get_encoding)
+    cache = CMapCache(8)
+    monkeypatch.setattr(cmap_cache, 'get_cmap_cache', lambda: cache)
+    return cache
+
+
+def test_backends_leave_pypdf_alone(unpatched, sample_pdf):
+    backend = PyPDFBackend()
+    backend.page_text(backend.open(sample_pdf), 0)
+    assert _cmap.get_encoding is cmap_cache._original_get_encoding
+    assert unpatched.stats()['misses'] == 0
+
+
+def test_installed_cache_serves_repeated_fonts(unpatched, sample_pdf):
+    assert install_cmap_cache()
+    assert install_cmap_cache()
+    assert _font.get_encoding is cmap_cache._cached_get_encoding
+
+    texts = [page.extract_text() for page in PdfReader(sample_pdf).pages]
+    assert texts == [page.extract_text() for page in PdfReader(sample_pdf).pages]
+    stats = unpatched.stats()
+    assert stats['fonts'] >= 1
+    assert stats['hits'] > stats['misses']
+
+
+def test_other_pypdf_releases_are_not_patched(unpatched, monkeypatch):
+    monkeypatch.setattr(pypdf, '__version__', '7.0.0')
+    assert not install_cmap_cache()
+    assert _cmap.get_encoding is cmap_cache._original_get_encoding
@@ -0,0 +1,83 @@
+import io
+import os
+
+import pytest
+
+from utils.document_source import BufferStream, as_bytes, open_stream, write_source
+from utils.instructions import EditOperation, REPLACE
+from utils.pdf_backends import PyMuPDFBackend, PyPDFBackend
+
+DATA = bytes(range(10))
+
+
+def test_reads_and_seeks_like_a_file():
+    stream = BufferStream(DATA)
+    assert stream.read(3) == DATA[:3]
+    assert stream.seek(-2, io.SEEK_END) == 8
+    assert stream.read() == DATA[8:]
+    assert stream.read(5) == b''
+    assert stream.seek(-4, io.SEEK_CUR) == 6
+    assert stream.seek(-100, io.SEEK_CUR) == 0
+
+    target = bytearray(4)
+    stream.seek(7)
+    assert stream.readinto(target) == 3
+    assert bytes(target[:3]) == DATA[7:]
+    assert stream.tell() == 10
+
+
+def test_buffer_is_shared_not_copied():
+    data = bytearray(DATA)
+    stream = BufferStream(data)
+    data[0] = 99
+    assert stream.getbuffer()[0] == 99
+    stream.close()
+    assert stream.closed
+
+
+def test_as_bytes_reuses_bytes_objects():
+    assert as_bytes(DATA) is DATA
+    assert as_bytes(memoryview(DATA)) is DATA
+    assert as_bytes(memoryview(DATA)[2:]) == DATA[2:]
+    assert as_bytes(bytearray(DATA)) == DATA
+
+
+def test_paths_open_as_read_only_maps(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(DATA)
+    stream = open_stream(str(path))
+    try:
+        assert stream[:] == DATA
+        with pytest.raises(TypeError):
+            stream[0] = 1
+    finally:
+        stream.close()
+
+
+def test_write_source_copies_paths_and_buffers(tmp_path):
+    source = tmp_path / 'source.bin'
+    source.write_bytes(DATA)
+    write_source(str(source), str(tmp_path / 'from_path.bin'))
+    write_source(memoryview(DATA), str(tmp_path / 'from_buffer.bin'))
+    assert (tmp_path / 'from_path.bin').read_bytes() == DATA
+    assert (tmp_path / 'from_buffer.bin').read_bytes() == DATA
+
+
+@pytest.mark.parametrize('backend', [PyMuPDFBackend, PyPDFBackend])
+def test_backends_read_buffers_like_files(backend, sample_pdf, tmp_path):
+    with open(sample_pdf, 'rb') as file:
+        data = file.read()
+    engine = backend()
+
+    for source in (sample_pdf, data):
+        doc = engine.open(source)
+        try:
+            assert engine.page_count(doc) == 3
+            assert 'Introduction 2' in engine.page_text(doc, 1)
+        finally:
+            engine.close(doc)
+
+    output_path = str(tmp_path / 'edited.pdf')
+    operations = [EditOperation(REPLACE, 'Introduction 2', 'Overview 2')]
+    assert engine.apply_edits(data, output_path, operations) == [1]
+    assert os.path.getsize(output_path) > 0
@@ -0,0 +1,73 @@
+import fitz
+import pytest
+
+from utils.edit_pipeline import EditPipeline
+from utils.pdf_processor import PDFProcessor
+from utils.text_cache import PageTextCache
+
+RESPONSE = (
+    "REPLACE: quarterly revenue -> annual revenue\n"
+    "HIGHLIGHT: annual revenue\n"
+    "HIGHLIGHT: quarterly revenue\n"
+    "REPLACE: quarterly revenue -> annual revenue\n"
+    "HIGHLIGHT: Introduction 2"
+)
+
+# Lines of body text per page in the benchmark corpus
+LINES_PER_PAGE = 40
+
+
+@pytest.fixture(params=['pymupdf', 'pypdf'])
+def processor(request, tmp_path):
+    processor = PDFProcessor(backend=request.param, cache=PageTextCache(str(tmp_path / 'cache'), 64))
+    processor.config.WINDOWED_EDITS = False
+    processor.config.INCREMENTAL_SAVE = False
+    return processor
+
+
+def run(pipeline, chunk_size=7):
+    for start in range(0, len(RESPONSE), chunk_size):
+        pipeline.feed(RESPONSE[start:start + chunk_size])
+    return pipeline.finish()
+
+
+def summary(results):
+    return [(edit.operation.kind, edit.operation.target, edit.matches, edit.applied) for edit in results]
+
+
+def highlighted_pages(path):
+    doc = fitz.open(path)
+    try:
+        return [page.number for page in doc if page.first_annot is not None]
+    finally:
+        doc.close()
+
+
+def test_instructions_see_earlier_replacements(processor, sample_pdf, tmp_path):
+    output_path = str(tmp_path / 'edited.pdf')
+    results = run(EditPipeline(processor, sample_pdf, output_path))
+
+    lines = 3 * LINES_PER_PAGE
+    assert summary(results) == [
+        ('replace', 'quarterly revenue', lines, lines),
+        ('highlight', 'annual revenue', lines, lines),
+        ('highlight', 'quarterly revenue', 0, 0),
+        ('highlight', 'Introduction 2', 1, 1),
+    ]
+    assert highlighted_pages(output_path) == [0, 1, 2]
+
+
+def test_windowed_edits_locate_every_instruction_in_the_original(processor, sample_pdf, tmp_path):
+    processor.config.WINDOWED_EDITS = True
+    output_path = str(tmp_path / 'edited.pdf')
+    results = run(EditPipeline(processor, sample_pdf, output_path))
+
+    lines = 3 * LINES_PER_PAGE
+    assert [(kind, target, matches) for kind, target, matches, _ in summary(results)] == [
+        ('replace', 'quarterly revenue', lines),
+        ('highlight', 'annual revenue', 0),
+        ('highlight', 'quarterly revenue', lines),
+        ('highlight', 'Introduction 2', 1),
+    ]
+    assert results[0].applied == lines
+    assert results[3].applied == 1
@@ -0,0 +1,57 @@
+import fitz
+import pytest
+from pypdf import PdfReader
+
+from utils import font_metrics
+from utils.font_metrics import FontMetricsCache, pypdf_font_metrics, standard_font_metrics
+
+
+@pytest.fixture
+def embedded_font_pdf(tmp_path):
+    """One page drawn in a simple font with its font program embedded"""
+    path = tmp_path / 'embedded.pdf'
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_font(fontname='F0', fontbuffer=fitz.Font('helv').buffer, set_simple=True)
+    page.insert_text((72, 72), 'Revenue grew', fontname='F0', fontsize=11)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = FontMetricsCache(8)
+    monkeypatch.setattr(font_metrics, 'get_font_metrics_cache', lambda: cache)
+    return cache
+
+
+def first_font(reader):
+    fonts = reader.pages[0]['/Resources']['/Font']
+    return fonts.raw_get(next(iter(fonts)))
+
+
+def test_embedded_fonts_are_measured_from_their_widths(embedded_font_pdf, cache):
+    metrics = pypdf_font_metrics(first_font(PdfReader(embedded_font_pdf)))
+    expected = standard_font_metrics('Helvetica').measure('Revenue grew', 11)
+    assert metrics.measure('Revenue grew', 11) == pytest.approx(expected, rel=0.01)
+
+
+def test_documents_sharing_a_font_share_its_metrics(embedded_font_pdf, cache):
+    first = pypdf_font_metrics(first_font(PdfReader(embedded_font_pdf)))
+    second = pypdf_font_metrics(first_font(PdfReader(embedded_font_pdf)))
+    assert first is second
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['hits'] == 1
+
+
+def test_repeated_lookups_do_not_hash_the_font_again(embedded_font_pdf, cache, monkeypatch):
+    font = first_font(PdfReader(embedded_font_pdf))
+    metrics = pypdf_font_metrics(font)
+
+    def fail(font_dict):
+        raise AssertionError("font hashed again")
+
+    monkeypatch.setattr(font_metrics, '_hash_pypdf_font', fail)
+    assert pypdf_font_metrics(font) is metrics
+    assert cache.stats()['hits'] == 1
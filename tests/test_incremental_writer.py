@@ -0,0 +1,95 @@
+import shutil
+
+import fitz
+from pypdf import PdfReader
+
+from utils.instructions import EditOperation, REPLACE, HIGHLIGHT
+from utils.pdf_backends import PyPDFBackend
+
+
+def edit_first_page_twice(source, output_path):
+    """Stage two rounds of edits on page 1 within one incremental update"""
+    session = PyPDFBackend().begin_edits(source, output_path, incremental=True)
+    try:
+        first = session.stage([
+            EditOperation(REPLACE, 'Introduction 1', 'Overview 1'),
+            EditOperation(HIGHLIGHT, 'Section 1.3:', None),
+        ])
+        second = session.stage([
+            EditOperation(REPLACE, 'quarterly revenue', 'annual revenue'),
+            EditOperation(HIGHLIGHT, 'Section 1.5:', None),
+        ])
+        session.commit()
+    finally:
+        session.close()
+    return first, second
+
+
+def annotation_count(page):
+    annotations = page.get('/Annots')
+    return len(annotations.get_object()) if annotations is not None else 0
+
+
+def test_update_is_appended_to_the_original_bytes(sample_pdf, tmp_path):
+    output_path = tmp_path / 'edited.pdf'
+    edit_first_page_twice(sample_pdf, str(output_path))
+
+    with open(sample_pdf, 'rb') as file:
+        original = file.read()
+    edited = output_path.read_bytes()
+    assert len(edited) > len(original)
+    assert edited.startswith(original)
+
+
+def test_page_edited_twice_reads_back_in_strict_pypdf(sample_pdf, tmp_path):
+    output_path = tmp_path / 'edited.pdf'
+    first, second = edit_first_page_twice(sample_pdf, str(output_path))
+    assert first == [1, 1]
+    assert second == [120, 1]
+
+    reader = PdfReader(str(output_path), strict=True)
+    assert len(reader.pages) == 3
+    text = reader.pages[0].extract_text()
+    assert 'Overview 1' in text
+    assert 'annual revenue' in text
+    assert 'quarterly revenue' not in text
+    # Both rounds of highlights survive on the page edited twice
+    assert annotation_count(reader.pages[0]) == 2
+    assert annotation_count(reader.pages[1]) == 0
+    assert 'annual revenue' in reader.pages[2].extract_text()
+
+
+def test_page_edited_twice_opens_in_mupdf_without_repair(sample_pdf, tmp_path):
+    output_path = tmp_path / 'edited.pdf'
+    edit_first_page_twice(sample_pdf, str(output_path))
+
+    doc = fitz.open(str(output_path))
+    try:
+        assert not doc.is_repaired
+        page = doc[0]
+        assert 'Overview 1' in page.get_text()
+        assert 'quarterly revenue' not in page.get_text()
+        assert len(list(page.annots())) == 2
+    finally:
+        doc.close()
+
+
+def test_chained_updates_read_back(sample_pdf, tmp_path):
+    path = tmp_path / 'chained.pdf'
+    shutil.copy(sample_pdf, path)
+    backend = PyPDFBackend()
+    backend.append_edits(str(path), [EditOperation(REPLACE, 'Introduction 2', 'Overview 2')], {1: [0]})
+    backend.append_edits(str(path), [EditOperation(HIGHLIGHT, 'Section 2.1:', None)], {1: [0]})
+    backend.append_edits(str(path), [EditOperation(REPLACE, 'Overview 2', 'Summary 2')], {1: [0]})
+
+    reader = PdfReader(str(path), strict=True)
+    assert 'Summary 2' in reader.pages[1].extract_text()
+    assert annotation_count(reader.pages[1]) == 1
+
+    doc = fitz.open(str(path))
+    try:
+        assert not doc.is_repaired
+        assert 'Summary 2' in doc[1].get_text()
+        assert len(list(doc[1].annots())) == 1
+    finally:
+        doc.close()
@@ -0,0 +1,37 @@
+from utils.instructions import EditOperation, InstructionStream, REPLACE, HIGHLIGHT, parse_instructions
+
+RESPONSE = (
+    "Here are the edits:\n"
+    "REPLACE: quarterly revenue -> annual revenue\n"
+    "HIGHLIGHT: operating costs\n"
+    "\n"
+    "REPLACE: Introduction 1 -> Overview 1"
+)
+
+
+def stream(chunks):
+    instructions = InstructionStream()
+    operations = []
+    for chunk in chunks:
+        operations.extend(instructions.feed(chunk))
+    return operations + instructions.finish()
+
+
+def test_every_two_way_split_parses_like_the_whole_response():
+    expected = parse_instructions(RESPONSE)
+    assert len(expected) == 3
+    for cut in range(len(RESPONSE) + 1):
+        assert stream([RESPONSE[:cut], RESPONSE[cut:]]) == expected
+
+
+def test_character_by_character():
+    assert stream(RESPONSE) == parse_instructions(RESPONSE)
+
+
+def test_line_is_emitted_once_it_is_complete():
+    instructions = InstructionStream()
+    assert instructions.feed("HIGHLIGHT: operating") == []
+    assert instructions.feed(" costs\nREPLACE: a ") == [EditOperation(HIGHLIGHT, 'operating costs', None)]
+    assert instructions.feed("-> b") == []
+    assert instructions.finish() == [EditOperation(REPLACE, 'a', 'b')]
+    assert instructions.finish() == []
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from config import Config
+from utils.huggingface_integration import HuggingFaceIntegration
+from utils.llm_providers import get_provider, get_provider_class
+from utils.local_inference import LocalInferenceProvider
+from utils.response_cache import ResponseCache
+
+JSON = 'application/json'
+
+
+def reply(result):
+    return (JSON, [json.dumps(result).encode('utf-8')])
+
+
+@pytest.fixture
+def local(monkeypatch, inference_server):
+    """Configure the local provider against the stub server; call with the API it should speak"""
+    monkeypatch.setattr(Config, 'LLM_CACHE', False)
+    monkeypatch.setattr(Config, 'LOCAL_LLM_URL', inference_server.url + '/')
+    monkeypatch.setattr(Config, 'LOCAL_LLM_MODEL', 'stub-model')
+    monkeypatch.setattr(Config, 'LOCAL_LLM_API_KEY', None)
+
+    def configure(api):
+        monkeypatch.setattr(Config, 'LOCAL_LLM_API', api)
+        return LocalInferenceProvider()
+    return configure
+
+
+def test_providers_are_looked_up_by_name(monkeypatch):
+    monkeypatch.setattr(Config, 'LLM_CACHE', False)
+    monkeypatch.setattr(Config, 'LOCAL_LLM_API', 'openai')
+    assert get_provider_class('HuggingFace') is HuggingFaceIntegration
+    assert isinstance(get_provider('local'), LocalInferenceProvider)
+    with pytest.raises(Exception, match="Unknown LLM provider 'openai'. Choose one of: huggingface, local"):
+        get_provider_class('openai')
+
+
+def test_hugging_face_posts_to_the_model_with_its_key(monkeypatch):
+    monkeypatch.setattr(Config, 'HUGGINGFACE_API_KEY', 'hf_test')
+    monkeypatch.setattr(Config, 'HUGGINGFACE_MODEL', 'org/model')
+    provider = HuggingFaceIntegration()
+    assert provider.requires_api_key
+    assert provider.api_url == "https://api-inference.huggingface.co/models/org/model"
+    assert provider._headers()['Authorization'] == "Bearer hf_test"
+
+
+def test_openai_servers_get_completions_requests(local, inference_server, monkeypatch):
+    monkeypatch.setattr(Config, 'LLM_DETERMINISTIC', True)
+    provider = local('OpenAI')
+    assert provider.api_url == f"{inference_server.url}/v1/completions"
+    assert 'Authorization' not in provider._headers()
+
+    inference_server.reply = reply({'choices': [{'text': " HIGHLIGHT: costs\n"}]})
+    assert provider.generate_text("Highlight the costs") == "HIGHLIGHT: costs"
+    path, _, payload = inference_server.requests[0]
+    assert path == '/v1/completions'
+    assert payload == {
+        'model': 'stub-model',
+        'prompt': "Highlight the costs",
+        'max_tokens': provider.token_budget.max_new_tokens,
+        'temperature': 0.0,
+        'stream': False,
+    }
+
+
+def test_openai_responses_without_choices_fail(local, inference_server):
+    inference_server.reply = reply({'object': 'error'})
+    with pytest.raises(Exception, match="Unexpected response from the local server"):
+        local('openai').generate_text("Highlight the costs")
+
+
+def test_tgi_servers_get_inference_api_requests(local, inference_server, monkeypatch):
+    monkeypatch.setattr(Config, 'LLM_DETERMINISTIC', False)
+    provider = local('tgi')
+    assert provider.api_url == inference_server.url
+
+    inference_server.reply = reply([{'generated_text': "HIGHLIGHT: costs"}])
+    assert provider.generate_text("Highlight the costs") == "HIGHLIGHT: costs"
+    path, _, payload = inference_server.requests[0]
+    assert path == '/'
+    assert payload['inputs'] == "Highlight the costs"
+    assert payload['parameters']['do_sample'] is True
+    assert 'model' not in payload
+
+
+def test_unknown_local_apis_are_rejected(local):
+    with pytest.raises(Exception, match="Unknown local inference API 'grpc'"):
+        local('grpc')
+
+
+def test_cached_answers_are_not_shared_between_providers(local, inference_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'LLM_DETERMINISTIC', True)
+    monkeypatch.setattr(Config, 'HUGGINGFACE_MODEL', 'stub-model')
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite3'), 8, 60)
+
+    # Same model, parameters and wire format; only the provider and endpoint differ
+    hosted = HuggingFaceIntegration()
+    hosted.api_url = f"{inference_server.url}/models/stub-model"
+    tgi = local('tgi')
+    for provider in (hosted, tgi):
+        provider.response_cache = cache
+
+    inference_server.reply = reply([{'generated_text': "from the hosted model"}])
+    assert hosted.generate_text("Highlight the costs") == "from the hosted model"
+    inference_server.reply = reply([{'generated_text': "from the local model"}])
+    assert tgi.generate_text("Highlight the costs") == "from the local model"
+    assert hosted.generate_text("Highlight the costs") == "from the hosted model"
+    assert len(inference_server.requests) == 2
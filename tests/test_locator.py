@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from utils import locator
+from utils.locator import TargetLocator
+
+
+@pytest.fixture(autouse=True)
+def pure_python(monkeypatch):
+    """Exercise the built-in automaton even where pyahocorasick is installed"""
+    monkeypatch.setattr(locator, 'ahocorasick', None)
+
+
+def brute_force(targets, text):
+    found = set()
+    for target in set(targets):
+        offset = text.find(target)
+        while offset != -1:
+            found.add((target, offset))
+            offset = text.find(target, offset + 1)
+    return found
+
+
+def test_pure_python_automaton_is_used():
+    assert TargetLocator(['a', 'b'])._automaton is None
+
+
+def test_overlapping_and_nested_targets():
+    targets = ['he', 'she', 'his', 'hers', 'her']
+    text = 'ushers and his sheriff hershe'
+    matches = list(TargetLocator(targets).find(text))
+    assert len(matches) == len(set(matches))
+    assert set(matches) == brute_force(targets, text)
+
+
+def test_matches_brute_force_on_random_text():
+    rng = random.Random(7)
+    for _ in range(300):
+        text = ''.join(rng.choice('abc ') for _ in range(80))
+        targets = [''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(2, 6))]
+        matches = list(TargetLocator(targets).find(text))
+        assert sorted(matches) == sorted(brute_force(targets, text)), (targets, text)
+
+
+def test_duplicate_and_empty_targets():
+    matches = list(TargetLocator(['costs', '', 'costs', 'operating costs']).find('operating costs, costs'))
+    assert sorted(matches) == [('costs', 10), ('costs', 17), ('operating costs', 0)]
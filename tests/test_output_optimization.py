@@ -0,0 +1,50 @@
+import pytest
+from pypdf import PdfReader
+
+from config import Config
+from utils.instructions import EditOperation, REPLACE
+from utils.pdf_backends import OPTIMIZE_PRESETS, PyPDFBackend
+from utils.pdf_processor import PDFProcessor
+from utils.text_cache import PageTextCache
+
+OPERATIONS = [EditOperation(REPLACE, 'quarterly revenue', 'annual revenue')]
+
+
+@pytest.fixture
+def processor(tmp_path):
+    processor = PDFProcessor(backend='pypdf', cache=PageTextCache(str(tmp_path / 'cache'), 64))
+    processor.config.WINDOWED_EDITS = False
+    processor.config.INCREMENTAL_SAVE = False
+    return processor
+
+
+def test_pypdf_presets_trade_size_for_time(sample_pdf, tmp_path):
+    sizes = {}
+    for preset in OPTIMIZE_PRESETS:
+        output_path = tmp_path / f'{preset}.pdf'
+        assert PyPDFBackend().apply_edits(sample_pdf, str(output_path), OPERATIONS, optimize=preset) == [120]
+        sizes[preset] = output_path.stat().st_size
+        assert 'annual revenue' in PdfReader(str(output_path)).pages[2].extract_text()
+
+    # Without optimization the rewritten content streams are written out decoded
+    assert sizes['small'] <= sizes['fast'] < sizes['none']
+
+
+def test_configured_preset_is_the_default(processor, sample_pdf, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'OUTPUT_OPTIMIZATION', 'small')
+    presets = []
+    apply_edits = processor.backend.apply_edits
+
+    def spy(*args, optimize, **kwargs):
+        presets.append(optimize)
+        return apply_edits(*args, optimize=optimize, **kwargs)
+
+    monkeypatch.setattr(processor.backend, 'apply_edits', spy)
+    processor.apply_edits(sample_pdf, str(tmp_path / 'default.pdf'), OPERATIONS)
+    processor.apply_edits(sample_pdf, str(tmp_path / 'override.pdf'), OPERATIONS, optimize='none')
+    assert presets == ['small', 'none']
+
+
+def test_unknown_presets_are_rejected(processor, sample_pdf, tmp_path):
+    with pytest.raises(Exception, match="Unknown optimization preset 'tiny'"):
+        processor.apply_edits(sample_pdf, str(tmp_path / 'out.pdf'), OPERATIONS, optimize='tiny')
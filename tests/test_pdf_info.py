@@ -0,0 +1,86 @@
+import json
+
+import fitz
+import pytest
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import NameObject, TextStringObject
+
+from utils.pdf_backends import PyMuPDFBackend, PyPDFBackend
+from utils.pdf_processor import PDFProcessor
+from utils.text_cache import PageTextCache
+
+BACKENDS = [PyMuPDFBackend, PyPDFBackend]
+
+
+def rewrite(source, output_path, title=None, user_password=None, owner_password=None):
+    """Copy source with pypdf, storing title as an indirect object and optionally encrypting"""
+    writer = PdfWriter(clone_from=source)
+    if title is not None:
+        writer._info.get_object()[NameObject('/Title')] = writer._add_object(TextStringObject(title))
+    if user_password is not None:
+        writer.encrypt(user_password, owner_password, algorithm='RC4-128')
+    writer.write(output_path)
+    return str(output_path)
+
+
+@pytest.fixture
+def outlined_pdf(tmp_path):
+    """Two pages whose outline has an entry pointing at no page"""
+    path = tmp_path / 'outlined.pdf'
+    doc = fitz.open()
+    doc.new_page()
+    doc.new_page()
+    doc.set_toc([[1, 'Introduction', 1], [2, 'Results', 2], [1, 'Notes', -1]])
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_info_describes_the_sample(backend, sample_pdf):
+    info = backend().get_pdf_info(sample_pdf)
+    assert info['pages'] == 3
+    assert info['encrypted'] is False
+    assert info['text_available'] is True
+    assert len(info['page_sizes']) == 3
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_indirect_metadata_is_read_as_text(backend, sample_pdf, tmp_path):
+    path = rewrite(sample_pdf, tmp_path / 'titled.pdf', title='Quarterly report')
+    info = backend().get_pdf_info(path)
+    assert info['title'] == 'Quarterly report'
+    assert json.loads(json.dumps(info)) == info
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_outline_entries_without_a_page(backend, outlined_pdf):
+    info = backend().get_pdf_info(outlined_pdf)
+    assert info['outline'] == [[1, 'Introduction', 1], [2, 'Results', 2], [1, 'Notes', -1]]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_documents_locked_by_a_user_password(backend, sample_pdf, tmp_path):
+    path = rewrite(sample_pdf, tmp_path / 'locked.pdf', user_password='secret', owner_password='owner')
+    info = backend().get_pdf_info(path)
+    assert info['encrypted'] is True
+    assert info['pages'] == 'unknown'
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_documents_with_only_an_owner_password(backend, sample_pdf, tmp_path):
+    path = rewrite(sample_pdf, tmp_path / 'restricted.pdf', user_password='', owner_password='owner')
+    assert PdfReader(path).is_encrypted
+    info = backend().get_pdf_info(path)
+    assert info['encrypted'] is True
+    assert info['pages'] == 3
+    assert info['text_available'] is True
+
+
+def test_processor_caches_info_with_indirect_metadata(sample_pdf, tmp_path):
+    path = rewrite(sample_pdf, tmp_path / 'titled.pdf', title='Quarterly report')
+    processor = PDFProcessor(backend='pypdf', cache=PageTextCache(str(tmp_path / 'cache'), 16))
+    assert processor.get_pdf_info(path)['title'] == 'Quarterly report'
+    # Served from the cache the second time
+    assert processor.get_pdf_info(path)['title'] == 'Quarterly report'
+    assert processor.cache.stats()['memory_hits'] == 1
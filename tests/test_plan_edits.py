@@ -0,0 +1,114 @@
+import re
+import threading
+
+import pytest
+
+from config import Config
+from utils import llm_integration
+from utils.llm_integration import INSTRUCTION_PROMPT, LLMIntegration
+from utils.llm_provider import CONTEXT_TEMPLATE, LLMProvider
+from utils.retrieval import Chunk, format_context
+from utils.token_budget import TokenBudget, TokenCounter
+
+PROMPT = "tighten the wording"
+PAGE = "the quarterly revenue grew while operating costs fell"
+PAGE_MARKER = re.compile(r'\[Page (\d+)\]')
+
+
+class StubProvider(LLMProvider):
+    """Answers every window with one shared REPLACE and a HIGHLIGHT per page it saw"""
+    name = 'stub'
+    title = 'Stub'
+
+    def __init__(self, failing_pages=()):
+        super().__init__()
+        self.failing_pages = set(failing_pages)
+        self.windows = []
+        self._lock = threading.Lock()
+
+    def _query(self, prompt):
+        pages = [int(page) for page in PAGE_MARKER.findall(prompt)]
+        with self._lock:
+            self.windows.append(pages)
+        if self.failing_pages.intersection(pages):
+            raise Exception("server error")
+        lines = ["REPLACE: revenue -> income"] + [f"HIGHLIGHT: page {page}" for page in pages]
+        return "\n".join(lines)
+
+
+def planner(monkeypatch, pages_per_request, **stub_options):
+    """LLMIntegration over a StubProvider whose budget holds pages_per_request sample pages"""
+    provider = StubProvider(**stub_options)
+    counter = TokenCounter()
+    page_cost = provider.token_budget.cost(format_context([Chunk(0, PAGE)]))
+    fixed_text = CONTEXT_TEMPLATE.format(context="", prompt=INSTRUCTION_PROMPT.format(prompt=PROMPT))
+    max_new_tokens = 50
+    provider.token_budget = TokenBudget(
+        counter, max_new_tokens + counter.count(fixed_text) + page_cost * pages_per_request, max_new_tokens
+    )
+    monkeypatch.setattr(llm_integration, 'get_provider', lambda name: provider)
+    return LLMIntegration(), provider
+
+
+def pages(count):
+    return [(page, PAGE) for page in range(count)]
+
+
+def test_windows_fill_the_context_budget(monkeypatch):
+    integration, provider = planner(monkeypatch, 2)
+    instructions, failed, trimmed = integration.plan_edits(PROMPT, pages(5), max_workers=1)
+    assert provider.windows == [[1, 2], [3, 4], [5]]
+    assert (failed, trimmed) == (0, 0)
+    # The shared REPLACE is kept once, highlights follow in page order
+    assert instructions.split("\n") == ["REPLACE: revenue -> income"] + [
+        "HIGHLIGHT: page 1", "HIGHLIGHT: page 2", "HIGHLIGHT: page 3", "HIGHLIGHT: page 4", "HIGHLIGHT: page 5"
+    ]
+
+
+def test_window_pages_caps_each_window(monkeypatch):
+    integration, provider = planner(monkeypatch, 10)
+    integration.plan_edits(PROMPT, pages(5), window_pages=2, max_workers=1)
+    assert provider.windows == [[1, 2], [3, 4], [5]]
+
+
+def test_configured_window_pages_of_zero_means_no_cap(monkeypatch):
+    monkeypatch.setattr(Config, 'PLANNER_WINDOW_PAGES', 0)
+    integration, provider = planner(monkeypatch, 10)
+    integration.plan_edits(PROMPT, pages(5), max_workers=1)
+    assert provider.windows == [[1, 2, 3, 4, 5]]
+
+
+def test_blank_pages_are_not_sent(monkeypatch):
+    integration, provider = planner(monkeypatch, 2)
+    assert integration.plan_edits(PROMPT, [(0, ""), (1, "  \n")]) == ("", 0, 0)
+    integration.plan_edits(PROMPT, [(0, PAGE), (1, "\n"), (2, PAGE)], max_workers=1)
+    assert provider.windows == [[1, 3]]
+
+
+def test_windows_are_planned_concurrently(monkeypatch):
+    integration, provider = planner(monkeypatch, 1)
+    instructions, _, _ = integration.plan_edits(PROMPT, pages(6), max_workers=3)
+    assert sorted(provider.windows) == [[page] for page in range(1, 7)]
+    assert instructions.split("\n")[1:] == [f"HIGHLIGHT: page {page}" for page in range(1, 7)]
+
+
+def test_failed_windows_are_counted(monkeypatch):
+    integration, _ = planner(monkeypatch, 2, failing_pages={3})
+    instructions, failed, _ = integration.plan_edits(PROMPT, pages(5), max_workers=1)
+    assert failed == 1
+    assert "HIGHLIGHT: page 3" not in instructions
+    assert "HIGHLIGHT: page 5" in instructions
+
+
+def test_all_windows_failing_raises(monkeypatch):
+    integration, _ = planner(monkeypatch, 2, failing_pages={1, 3})
+    with pytest.raises(Exception, match="server error"):
+        integration.plan_edits(PROMPT, pages(3), max_workers=1)
+
+
+def test_only_pages_over_budget_are_trimmed(monkeypatch):
+    integration, provider = planner(monkeypatch, 2)
+    document = [(0, PAGE), (1, " ".join([PAGE] * 3)), (2, PAGE)]
+    _, failed, trimmed = integration.plan_edits(PROMPT, document, max_workers=1)
+    assert provider.windows == [[1], [2], [3]]
+    assert (failed, trimmed) == (0, 1)
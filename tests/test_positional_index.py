@@ -0,0 +1,75 @@
+import fitz
+import pytest
+
+from utils.pdf_processor import PDFProcessor
+from utils.positional_index import PositionalIndex, PositionalIndexStore
+from utils.text_cache import PageTextCache
+
+# Two lines of three 10-unit words, 2 units apart, on a 12-unit line pitch
+TEXT = "alpha beta gamma\ndelta epsilon zeta"
+WORDS = [
+    (0, 0, 10, 10, 'alpha'), (12, 0, 22, 10, 'beta'), (24, 0, 34, 10, 'gamma'),
+    (0, 12, 10, 22, 'delta'), (12, 12, 22, 22, 'epsilon'), (24, 12, 34, 22, 'zeta'),
+]
+
+
+def span(target, text=TEXT):
+    start = text.index(target)
+    return start, start + len(target)
+
+
+@pytest.fixture
+def index():
+    return PositionalIndex.build([(TEXT, WORDS), ("", [])])
+
+
+def test_words_are_aligned_with_the_page_text(index):
+    assert index.page_count == 2
+    assert list(index.offsets) == [TEXT.index(word[4]) for word in WORDS]
+    assert index.rects_for_span(1, 0, 5) == []
+
+
+def test_words_on_one_line_merge_into_one_rect(index):
+    assert index.rects_for_span(0, *span('beta gamma')) == [(12, 0, 34, 10)]
+
+
+def test_spans_across_lines_give_a_rect_per_line(index):
+    assert index.rects_for_span(0, *span('gamma\ndelta')) == [(24, 0, 34, 10), (0, 12, 10, 22)]
+
+
+def test_words_cut_by_the_span_are_trimmed(index):
+    (x0, _, x1, _), = index.rects_for_span(0, *span('ta gam'))
+    # The last two of beta's four letters and the first three of gamma's five
+    assert x0 == pytest.approx(17)
+    assert x1 == pytest.approx(30)
+
+
+def test_unaligned_words_are_skipped():
+    index = PositionalIndex.build([("alpha gamma", [(0, 0, 10, 10, 'alpha'), (12, 0, 22, 10, 'beta')])])
+    assert list(index.offsets) == [0, -1]
+    assert index.rects_for_span(0, 0, 11) == [(0, 0, 10, 10)]
+
+
+def test_store_reloads_indexes_from_disk(index, tmp_path):
+    PositionalIndexStore(str(tmp_path), 1).put('pymupdf', 'abc123', index)
+
+    reloaded = PositionalIndexStore(str(tmp_path), 1).get('pymupdf', 'abc123')
+    assert reloaded is not index
+    assert reloaded.rects_for_span(0, *span('epsilon')) == index.rects_for_span(0, *span('epsilon'))
+    assert PositionalIndexStore(str(tmp_path), 1).get('pymupdf', 'missing') is None
+
+
+def test_document_index_matches_the_backend_search(sample_pdf, tmp_path):
+    processor = PDFProcessor(backend='pymupdf', cache=PageTextCache(str(tmp_path / 'cache'), 64))
+    processor.index_store = PositionalIndexStore(str(tmp_path / 'index'), 2)
+    index = processor.positional_index(sample_pdf)
+    assert index.page_count == 3
+
+    page_text = dict(processor.iter_pages(sample_pdf))[1]
+    (x0, y0, x1, y1), = index.rects_for_span(1, *span('Section 2.3:', page_text))
+    doc = fitz.open(sample_pdf)
+    try:
+        found, = doc[1].search_for('Section 2.3:')
+    finally:
+        doc.close()
+    assert (x0, y0, x1, y1) == pytest.approx(tuple(found), abs=1)
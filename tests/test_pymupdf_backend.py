@@ -0,0 +1,121 @@
+import os
+
+import fitz
+import pytest
+from reportlab.pdfgen import canvas
+
+from utils.instructions import EditOperation, REPLACE, HIGHLIGHT
+from utils.pdf_backends import OPTIMIZE_PRESETS, PyMuPDFBackend, PyPDFBackend
+
+MIXED_CASE = "Revenue grew. The revenue team met. REVENUE up."
+
+
+@pytest.fixture
+def mixed_case_pdf(tmp_path):
+    path = tmp_path / 'mixed.pdf'
+    c = canvas.Canvas(str(path))
+    c.setFont("Helvetica", 11)
+    c.drawString(72, 720, MIXED_CASE)
+    c.showPage()
+    c.save()
+    return str(path)
+
+
+def page_text(path, index=0):
+    doc = fitz.open(path)
+    try:
+        return doc[index].get_text()
+    finally:
+        doc.close()
+
+
+def test_replace_matches_case_like_pypdf(mixed_case_pdf, tmp_path):
+    operations = [EditOperation(REPLACE, 'revenue', 'income')]
+    output_path = str(tmp_path / 'edited.pdf')
+
+    assert PyMuPDFBackend().apply_edits(mixed_case_pdf, output_path, operations) == [1]
+    text = page_text(output_path)
+    assert 'income' in text
+    assert 'Revenue' in text
+    assert 'REVENUE' in text
+    assert PyPDFBackend().apply_edits(mixed_case_pdf, str(tmp_path / 'pypdf.pdf'), operations) == [1]
+
+
+def test_highlight_and_search_match_case(mixed_case_pdf, tmp_path):
+    backend = PyMuPDFBackend()
+    output_path = str(tmp_path / 'highlighted.pdf')
+    assert backend.apply_edits(mixed_case_pdf, output_path, [EditOperation(HIGHLIGHT, 'REVENUE', None)]) == [1]
+
+    doc = backend.open(mixed_case_pdf)
+    try:
+        assert len(backend.search(doc, 0, 'Revenue')) == 1
+        assert backend.search(doc, 0, 'revenue grew') == []
+    finally:
+        backend.close(doc)
+
+
+def test_edits_on_the_sample(sample_pdf, tmp_path):
+    output_path = str(tmp_path / 'edited.pdf')
+    applied = PyMuPDFBackend().apply_edits(sample_pdf, output_path, [
+        EditOperation(REPLACE, 'Introduction 2', 'Overview 2'),
+        EditOperation(HIGHLIGHT, 'Section 3.1:', None),
+    ])
+    assert applied == [1, 1]
+    assert 'Overview 2' in page_text(output_path, 1)
+    assert 'Introduction 2' not in page_text(output_path, 1)
+
+    doc = fitz.open(output_path)
+    try:
+        assert len(list(doc[2].annots())) == 1
+    finally:
+        doc.close()
+
+
+def span_sizes(path, text):
+    doc = fitz.open(path)
+    try:
+        return [
+            round(span['size'], 1)
+            for block in doc[0].get_text('dict')['blocks']
+            for line in block.get('lines', [])
+            for span in line['spans']
+            if span['text'].strip() == text
+        ]
+    finally:
+        doc.close()
+
+
+def test_replacements_keep_the_original_size(sample_pdf, tmp_path):
+    output_path = str(tmp_path / 'sized.pdf')
+    PyMuPDFBackend().apply_edits(sample_pdf, output_path, [
+        EditOperation(REPLACE, 'Introduction 1', 'Overview 1'),
+        EditOperation(REPLACE, 'quarterly revenue', 'annual sales'),
+    ])
+
+    assert span_sizes(output_path, 'Overview 1') == [16.0]
+    assert set(span_sizes(output_path, 'annual sales')) == {11.0}
+
+
+def test_longer_replacements_shrink_to_the_old_width(sample_pdf, tmp_path):
+    output_path = str(tmp_path / 'shrunk.pdf')
+    PyMuPDFBackend().apply_edits(sample_pdf, output_path, [
+        EditOperation(REPLACE, 'quarterly revenue', 'quarterly consolidated revenue'),
+    ])
+
+    sizes = set(span_sizes(output_path, 'quarterly consolidated revenue'))
+    assert len(sizes) == 1
+    assert 4 <= sizes.pop() < 11
+
+
+def test_rewrites_stay_close_to_the_input_size(sample_pdf, tmp_path):
+    """Redactions leave no objects behind and each page gains one content stream, however many lines change"""
+    operations = [EditOperation(REPLACE, 'quarterly revenue', 'annual revenue')]
+    sizes = {}
+    for preset in OPTIMIZE_PRESETS:
+        output_path = tmp_path / f'{preset}.pdf'
+        PyMuPDFBackend().apply_edits(sample_pdf, str(output_path), operations, optimize=preset)
+        sizes[preset] = output_path.stat().st_size
+
+    input_size = os.path.getsize(sample_pdf)
+    assert sizes['small'] <= sizes['fast'] <= 1.5 * input_size
+    assert sizes['none'] <= 10 * input_size
@@ -0,0 +1,104 @@
+import io
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, ByteStringObject, DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+
+from utils.font_metrics import FontEncoding
+from utils.instructions import EditOperation, REPLACE
+from utils.pdf_backends import PyPDFBackend, _decode_string, _replace_text, _string_bytes
+
+HELVETICA = {'/Subtype': '/Type1', '/BaseFont': '/Helvetica'}
+
+
+def name(value):
+    return NameObject(value)
+
+
+def pdf_object(value):
+    """pypdf object for a plain dict, list, name string or int"""
+    if isinstance(value, dict):
+        return DictionaryObject({name(key): pdf_object(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return ArrayObject([pdf_object(item) for item in value])
+    if isinstance(value, str):
+        return name(value)
+    return NumberObject(value)
+
+
+def font_page(font, *strings):
+    """A page showing each string of character codes with font /F1, as a fresh reader sees it"""
+    writer = PdfWriter()
+    page = writer.add_blank_page(612, 792)
+    font = dict(font, **{'/Type': '/Font'})
+    page[name('/Resources')] = pdf_object({'/Font': {'/F1': {}}})
+    page['/Resources']['/Font'][name('/F1')] = writer._add_object(pdf_object(font))
+    content = b'BT /F1 12 Tf 72 720 Td ' + b' '.join(b'<' + data.hex().encode() + b'> Tj' for data in strings) + b' ET'
+    stream = DecodedStreamObject()
+    stream.set_data(content)
+    page[name('/Contents')] = writer._add_object(stream)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return PdfReader(buffer).pages[0]
+
+
+def shown_strings(content):
+    """Character codes of every Tj operand in an edited content stream"""
+    return [_string_bytes(operands[0]) for operands, operator in content.operations if operator == b'Tj']
+
+
+def replace(page, target, replacement):
+    content, counts = PyPDFBackend()._replace_in_content(page, [EditOperation(REPLACE, target, replacement)])
+    return shown_strings(content), counts[0]
+
+
+def test_win_ansi_fonts_are_rewritten_in_their_codes():
+    page = font_page(dict(HELVETICA, **{'/Encoding': '/WinAnsiEncoding'}), 'café'.encode('cp1252'))
+    assert replace(page, 'café', 'thé') == (['thé'.encode('cp1252')], 1)
+
+
+def test_mac_roman_fonts_use_mac_roman_codes():
+    page = font_page(dict(HELVETICA, **{'/Encoding': '/MacRomanEncoding'}), 'café'.encode('mac_roman'))
+    assert replace(page, 'café', 'thé') == (['thé'.encode('mac_roman')], 1)
+
+
+def test_differences_override_the_base_encoding():
+    encoding = {'/BaseEncoding': '/WinAnsiEncoding', '/Differences': [1, '/eacute']}
+    page = font_page(dict(HELVETICA, **{'/Encoding': encoding}), b'caf\x01')
+    assert replace(page, 'café', 'thé') == ([b'th\x01'], 1)
+
+
+def test_fonts_without_a_known_encoding_are_left_alone():
+    descriptor = {'/Type': '/FontDescriptor', '/FontName': '/Wingbats', '/Flags': 4}
+    symbolic = {'/Subtype': '/TrueType', '/BaseFont': '/Wingbats', '/FontDescriptor': descriptor}
+    assert replace(font_page(symbolic, b'abc'), 'abc', 'xyz') == ([b'abc'], 0)
+
+    composite = {'/Subtype': '/Type0', '/BaseFont': '/Helvetica', '/Encoding': '/Identity-H'}
+    assert replace(font_page(composite, b'ab'), 'ab', 'ba') == ([b'ab'], 0)
+
+
+def test_subset_fonts_only_write_glyphs_they_draw():
+    subset = {'/Subtype': '/Type1', '/BaseFont': '/ABCDEF+Helvetica', '/Encoding': '/WinAnsiEncoding'}
+    page = font_page(subset, b'cab', b'tab')
+
+    assert replace(page, 'cab', 'bat') == ([b'bat', b'tab'], 1)
+    assert replace(page, 'cab', 'dab') == ([b'cab', b'tab'], 0)
+
+
+def test_unmapped_codes_survive_a_rewrite():
+    encoding = FontEncoding({ord('a'): 'a', ord('b'): 'b'})
+    text = _decode_string(ByteStringObject(b'a\x07b'), encoding)
+    assert text.startswith('a') and text.endswith('b')
+    assert encoding.encode(text.replace('a', 'b')) == b'b\x07b'
+
+
+def test_decode_string_ignores_non_string_operands():
+    assert _decode_string(NumberObject(12), FontEncoding({ord('a'): 'a'})) is None
+
+
+def test_replace_text_skips_replacements_the_font_cannot_encode():
+    encoding = FontEncoding({code: chr(code) for code in range(32, 127)})
+    operations = [EditOperation(REPLACE, 'cost', 'coût'), EditOperation(REPLACE, 'fell', 'rose')]
+    counts = [0, 0]
+
+    assert _replace_text('cost fell, cost fell', operations, counts, encoding) == 'cost rose, cost rose'
+    assert counts == [0, 2]
@@ -0,0 +1,96 @@
+import sqlite3
+
+import pytest
+
+from config import Config
+from utils import response_cache
+from utils.llm_provider import LLMProvider
+from utils.response_cache import ResponseCache
+
+REQUEST = ('openai', 'https://api.example/v1', 'model-a', {'temperature': 0, 'max_tokens': 64}, 'Edit the PDF')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, 'time', clock)
+    return clock
+
+
+def cache_at(tmp_path, ttl_seconds=60):
+    return ResponseCache(str(tmp_path / 'responses.sqlite3'), 4, ttl_seconds)
+
+
+def test_key_covers_everything_that_shapes_the_response():
+    key = ResponseCache.key(*REQUEST)
+    provider, endpoint, model, parameters, prompt = REQUEST
+    assert ResponseCache.key(provider, endpoint, model, dict(reversed(list(parameters.items()))), prompt) == key
+    for changed in (
+        ('huggingface', endpoint, model, parameters, prompt),
+        (provider, 'http://localhost:8080/v1', model, parameters, prompt),
+        (provider, endpoint, 'model-b', parameters, prompt),
+        (provider, endpoint, model, dict(parameters, temperature=0.7), prompt),
+        (provider, endpoint, model, parameters, prompt + '.'),
+    ):
+        assert ResponseCache.key(*changed) != key
+
+
+def test_responses_outlive_the_process_in_sqlite(tmp_path, clock):
+    key = ResponseCache.key(*REQUEST)
+    cache = cache_at(tmp_path)
+    assert cache.get(key) is None
+    cache.put(key, 'REPLACE: a -> b')
+    assert cache.get(key) == 'REPLACE: a -> b'
+
+    restarted = cache_at(tmp_path)
+    assert restarted.get(key) == 'REPLACE: a -> b'
+    assert restarted.get(key) == 'REPLACE: a -> b'
+    assert restarted.stats() == {'memory_hits': 1, 'disk_hits': 1, 'misses': 0, 'memory_entries': 1}
+
+
+def test_expired_entries_miss_in_both_tiers(tmp_path, clock):
+    key = ResponseCache.key(*REQUEST)
+    cache = cache_at(tmp_path, ttl_seconds=60)
+    cache.put(key, 'old')
+    clock.now += 61
+    assert cache.get(key) is None
+    assert cache_at(tmp_path, ttl_seconds=60).get(key) is None
+
+
+def test_expired_rows_are_swept_on_put(tmp_path, clock):
+    cache = cache_at(tmp_path, ttl_seconds=60)
+    cache.put('stale', 'old')
+    clock.now += response_cache.PURGE_INTERVAL_SECONDS
+    cache.put('fresh', 'new')
+
+    with sqlite3.connect(str(tmp_path / 'responses.sqlite3')) as db:
+        assert [key for key, in db.execute("SELECT key FROM responses")] == ['fresh']
+
+
+def test_a_broken_database_only_costs_the_disk_tier(tmp_path, clock):
+    # A directory where the database file should be makes every SQLite call fail
+    (tmp_path / 'responses.sqlite3').mkdir()
+    cache = cache_at(tmp_path)
+    cache.put('key', 'kept in memory')
+    assert cache.get('key') == 'kept in memory'
+    assert cache.get('other') is None
+
+
+@pytest.mark.parametrize('deterministic, cache_sampled, cached', [
+    (True, False, True),
+    (False, False, False),
+    (False, True, True),
+])
+def test_only_reproducible_answers_are_cached(monkeypatch, deterministic, cache_sampled, cached):
+    monkeypatch.setattr(Config, 'LLM_CACHE', True)
+    monkeypatch.setattr(Config, 'LLM_DETERMINISTIC', deterministic)
+    monkeypatch.setattr(Config, 'LLM_CACHE_SAMPLED', cache_sampled)
+    assert (LLMProvider().response_cache is not None) == cached
@@ -0,0 +1,89 @@
+import pytest
+
+from utils.pdf_processor import PDFProcessor
+from utils.retrieval import BM25Index, Chunk, RetrievalIndexStore, chunk_pages, format_context, tokenize
+from utils.text_cache import PageTextCache
+
+CHUNKS = [
+    Chunk(0, "The company was founded in a small garage."),
+    Chunk(0, "Quarterly revenue grew by ten percent."),
+    Chunk(1, "Revenue from services doubled while revenue from hardware fell."),
+    Chunk(2, "The board thanks every employee."),
+]
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def test_tokens_are_lowercase_words():
+    assert tokenize("Revenue, REVENUE; re-venue") == ['revenue', 'revenue', 're', 'venue']
+
+
+def test_paragraphs_split_on_blank_lines_then_lines():
+    pages = [(0, "one two\nthree\n\nfour five six\nseven eight\nnine"), (1, "")]
+    assert chunk_pages(pages, 3) == [
+        Chunk(0, "one two\nthree"),
+        Chunk(0, "four five six"),
+        Chunk(0, "seven eight\nnine"),
+    ]
+
+
+def test_a_line_longer_than_the_limit_stays_whole():
+    assert chunk_pages([(0, "a b c d e")], 2) == [Chunk(0, "a b c d e")]
+
+
+def test_more_matching_chunks_score_higher():
+    scores = BM25Index(CHUNKS).scores("revenue")
+    assert scores[0] == scores[3] == 0
+    assert scores[2] > scores[1] > 0
+
+
+def test_rare_terms_outweigh_common_ones():
+    scores = BM25Index(CHUNKS).scores("revenue garage")
+    assert scores[0] > scores[1]
+
+
+def test_selection_keeps_document_order():
+    selected = BM25Index(CHUNKS).select("revenue services", 2, 100, word_count)
+    assert selected == [CHUNKS[1], CHUNKS[2]]
+
+
+def test_selection_skips_chunks_over_the_budget():
+    # The best chunk costs 9 words; with a budget of 8 the next one still fits
+    selected = BM25Index(CHUNKS).select("revenue", 8, 8, word_count)
+    assert selected == [CHUNKS[1]]
+
+
+def test_unmatched_queries_fall_back_to_the_opening_chunks():
+    assert BM25Index(CHUNKS).select("make it more formal", 2, 100, word_count) == CHUNKS[:2]
+    assert BM25Index([]).select("revenue", 2, 100, word_count) == []
+
+
+def test_context_marks_pages_from_one():
+    assert format_context(CHUNKS[1:3]) == (
+        "[Page 1]\nQuarterly revenue grew by ten percent.\n\n"
+        "[Page 2]\nRevenue from services doubled while revenue from hardware fell."
+    )
+
+
+def test_store_builds_each_document_once():
+    store = RetrievalIndexStore(2)
+    built = []
+
+    def build():
+        built.append(1)
+        return BM25Index(CHUNKS)
+
+    first = store.get('pypdf', 'abc', build)
+    assert store.get('pypdf', 'abc', build) is first
+    assert store.get('pymupdf', 'abc', build) is not first
+    assert len(built) == 2
+
+
+def test_context_comes_from_the_matching_page(sample_pdf, tmp_path):
+    processor = PDFProcessor(backend='pymupdf', cache=PageTextCache(str(tmp_path / 'cache'), 64))
+    processor.retrieval_store = RetrievalIndexStore(2)
+    context = processor.retrieve_context(sample_pdf, "Introduction 3", top_k=1)
+    assert context.startswith("[Page 3]\n")
+    assert "Introduction 3" in context
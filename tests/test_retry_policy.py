@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from utils.retry_policy import RetryPolicy, RetryableError
+
+
+class Flaky:
+    """Operation failing with RetryableError until its failures run out"""
+    def __init__(self, failures, retry_after=None, duration=0.0):
+        self.failures = failures
+        self.retry_after = retry_after
+        self.duration = duration
+        self.calls = []
+
+    def __call__(self, remaining):
+        self.calls.append(remaining)
+        time.sleep(self.duration)
+        if len(self.calls) <= self.failures:
+            raise RetryableError("busy", self.retry_after)
+        return "ok"
+
+
+def test_succeeds_after_retries():
+    operation = Flaky(failures=2)
+    assert RetryPolicy(5, 0, 0, 10).run(operation) == "ok"
+    assert len(operation.calls) == 3
+
+
+def test_gives_up_after_max_attempts():
+    operation = Flaky(failures=10)
+    with pytest.raises(Exception, match="after 3 attempt"):
+        RetryPolicy(3, 0, 0, 10).run(operation)
+    assert len(operation.calls) == 3
+
+
+def test_other_errors_are_not_retried():
+    calls = []
+
+    def operation(remaining):
+        calls.append(remaining)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        RetryPolicy(5, 0, 0, 10).run(operation)
+    assert len(calls) == 1
+
+
+def test_wait_past_the_deadline_gives_up_at_once():
+    operation = Flaky(failures=10, retry_after=30)
+    started = time.monotonic()
+    with pytest.raises(Exception, match="after 1 attempt"):
+        RetryPolicy(5, 0, 0, 1.0).run(operation)
+    assert time.monotonic() - started < 0.5
+
+
+def test_deadline_bounds_slow_attempts():
+    operation = Flaky(failures=100, duration=0.03)
+    started = time.monotonic()
+    with pytest.raises(Exception):
+        RetryPolicy(100, 0, 0, 0.1).run(operation)
+    assert len(operation.calls) < 10
+    assert time.monotonic() - started < 0.3
+    # Each attempt is told how much of the deadline is left
+    assert operation.calls == sorted(operation.calls, reverse=True)
+    assert operation.calls[0] <= 0.1
+
+
+def test_delay_is_capped():
+    policy = RetryPolicy(10, 1.0, 4.0, 60)
+    assert all(0 <= policy.delay(attempt) <= 4.0 for attempt in range(10))
+    assert 2.0 <= policy.delay(0, retry_after=2.0) <= 2.2
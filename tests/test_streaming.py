@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from config import Config
+from utils.huggingface_integration import HuggingFaceIntegration
+from utils.local_inference import LocalInferenceProvider
+
+EVENT_STREAM = 'text/event-stream'
+
+
+def token_event(text, special=False):
+    return {'token': {'id': 0, 'text': text, 'logprob': 0.0, 'special': special}}
+
+
+def sse(*events):
+    return b"".join(f"data:{json.dumps(event)}\n\n".encode('utf-8') for event in events)
+
+
+@pytest.fixture
+def streaming(monkeypatch):
+    monkeypatch.setattr(Config, 'LLM_CACHE', False)
+    monkeypatch.setattr(Config, 'LLM_STREAMING', True)
+
+
+@pytest.fixture
+def hf(streaming, inference_server):
+    provider = HuggingFaceIntegration()
+    provider.api_url = f"{inference_server.url}/models/stub"
+    return provider
+
+
+def stream(provider):
+    chunks, _ = provider.generate_stream("Highlight the costs", "[Page 1]\noperating costs fell")
+    return list(chunks)
+
+
+def test_tokens_arrive_in_order_without_special_ones(hf, inference_server):
+    inference_server.reply = (EVENT_STREAM, [sse(
+        token_event("  HIGHLIGHT:"), token_event(" operating costs"), token_event("</s>", special=True)
+    )])
+    assert stream(hf) == ["HIGHLIGHT:", " operating costs"]
+    _, _, payload = inference_server.requests[0]
+    assert payload['stream'] is True
+
+
+def test_only_data_lines_carry_events(hf, inference_server):
+    body = (
+        b": keep-alive\n"
+        b"event: token\nid: 1\n"
+        b"data: " + json.dumps(token_event("REPLACE: a -> b")).encode('utf-8') + b"\n\n"
+        b"retry: 1000\n\n"
+    )
+    inference_server.reply = (EVENT_STREAM, [body])
+    assert stream(hf) == ["REPLACE: a -> b"]
+
+
+def test_utf8_split_across_chunks(hf, inference_server):
+    body = sse(token_event("REPLACE: café"), token_event(" -> naïve "), token_event("Straße"))
+    # One byte per HTTP chunk cuts every multi-byte character and every line apart
+    inference_server.reply = (EVENT_STREAM, [body[i:i + 1] for i in range(len(body))])
+    assert "".join(stream(hf)) == "REPLACE: café -> naïve Straße"
+
+
+def test_error_events_raise(hf, inference_server):
+    inference_server.reply = (EVENT_STREAM, [sse(token_event("HIGHLIGHT:"), {'error': "Model overloaded"})])
+    with pytest.raises(Exception, match="Hugging Face API error: Model overloaded"):
+        stream(hf)
+
+
+def test_servers_without_streaming_answer_whole(hf, inference_server):
+    inference_server.reply = ('application/json', [b'[{"generated_text": " HIGHLIGHT: costs "}]'])
+    assert stream(hf) == ["HIGHLIGHT: costs"]
+
+
+def test_streaming_can_be_turned_off(hf, inference_server, monkeypatch):
+    monkeypatch.setattr(Config, 'LLM_STREAMING', False)
+    inference_server.reply = ('application/json', [b'[{"generated_text": "HIGHLIGHT: costs"}]'])
+    assert stream(hf) == ["HIGHLIGHT: costs"]
+    _, _, payload = inference_server.requests[0]
+    assert 'stream' not in payload
+
+
+def test_openai_streams_stop_at_done(streaming, inference_server, monkeypatch):
+    monkeypatch.setattr(Config, 'LOCAL_LLM_URL', inference_server.url)
+    monkeypatch.setattr(Config, 'LOCAL_LLM_API', 'openai')
+    body = (
+        sse({'choices': [{'text': "HIGHLIGHT:"}]}, {'choices': [{'text': ""}]}, {'choices': [{'text': " costs"}]})
+        + b"data: [DONE]\n\n"
+        + sse({'choices': [{'text': " ignored"}]})
+    )
+    inference_server.reply = (EVENT_STREAM, [body])
+    assert stream(LocalInferenceProvider()) == ["HIGHLIGHT:", " costs"]
@@ -0,0 +1,66 @@
+import hashlib
+
+import pytest
+
+from utils import edit_pipeline, pdf_processor
+from utils.edit_pipeline import EditPipeline
+from utils.instructions import EditOperation, REPLACE, HIGHLIGHT
+from utils.pdf_processor import PDFProcessor
+from utils.text_cache import PageTextCache, file_sha256
+
+
+@pytest.fixture
+def processor(tmp_path):
+    processor = PDFProcessor(backend='pypdf', cache=PageTextCache(str(tmp_path / 'cache'), 64))
+    processor.config.WINDOWED_EDITS = False
+    processor.config.INCREMENTAL_SAVE = False
+    return processor
+
+
+def test_file_hash_matches_for_paths_and_buffers(sample_pdf):
+    with open(sample_pdf, 'rb') as file:
+        data = file.read()
+    assert file_sha256(sample_pdf) == file_sha256(data) == hashlib.sha256(data).hexdigest()
+
+
+def test_pages_come_from_memory_then_disk(tmp_path):
+    cache = PageTextCache(str(tmp_path), 2)
+    cache.put('pypdf', 'abc', 0, 'first page')
+    assert cache.get('pypdf', 'abc', 0) == 'first page'
+    assert cache.get('pypdf', 'abc', 1) is None
+
+    restarted = PageTextCache(str(tmp_path), 2)
+    assert restarted.get('pypdf', 'abc', 0) == 'first page'
+    assert restarted.get('pypdf', 'abc', 0) == 'first page'
+    assert restarted.stats() == {'memory_hits': 1, 'disk_hits': 1, 'misses': 0, 'memory_entries': 1}
+
+
+def test_pages_are_extracted_once(processor, sample_pdf, monkeypatch):
+    first = list(processor.iter_pages(sample_pdf))
+
+    def fail(doc, index):
+        raise AssertionError(f"page {index} extracted again")
+
+    monkeypatch.setattr(processor.backend, 'page_text', fail)
+    assert list(processor.iter_pages(sample_pdf)) == first
+    assert [page for page, _ in first] == [0, 1, 2]
+    assert 'Introduction 2' in first[1][1]
+
+
+def test_known_file_hashes_are_not_recomputed(processor, sample_pdf, tmp_path, monkeypatch):
+    file_hash = file_sha256(sample_pdf)
+
+    def fail(pdf_path):
+        raise AssertionError("file hashed again")
+
+    monkeypatch.setattr(pdf_processor, 'file_sha256', fail)
+    monkeypatch.setattr(edit_pipeline, 'file_sha256', fail)
+
+    assert processor.get_pdf_info(sample_pdf, file_hash)['pages'] == 3
+    assert 'revenue' in processor.retrieve_context(sample_pdf, 'quarterly revenue', file_hash=file_hash)
+    operations = [EditOperation(REPLACE, 'Introduction 1', 'Overview 1'), EditOperation(HIGHLIGHT, 'Section 2.3:', None)]
+    assert processor.apply_edits(sample_pdf, str(tmp_path / 'batch.pdf'), operations, file_hash=file_hash) == [1, 1]
+
+    pipeline = EditPipeline(processor, sample_pdf, str(tmp_path / 'streamed.pdf'), file_hash=file_hash)
+    pipeline.feed("REPLACE: Introduction 1 -> Overview 1\nHIGHLIGHT: Section 2.3:\n")
+    assert [edit.applied for edit in pipeline.finish()] == [1, 1]
@@ -0,0 +1,66 @@
+from utils.token_budget import TokenBudget, TokenCounter
+
+QUERY = "operating costs"
+FIXED_TEXT = "Context: \n\nInstruction: highlight every mention of operating costs"
+SECTIONS = [
+    "[Page 1]\nThe weather was mild and the office moved to a new building.",
+    "[Page 2]\nOperating costs fell sharply as suppliers were consolidated.",
+    "[Page 3]\nStaff numbers stayed flat and the canteen menu changed twice.",
+    "[Page 4]\nA new logo was adopted after a lengthy design competition.",
+]
+CONTEXT = "\n\n".join(SECTIONS)
+
+
+def budget_for(context_tokens, max_new_tokens=20):
+    return TokenBudget(TokenCounter(), context_tokens, max_new_tokens)
+
+
+def test_available_leaves_room_for_fixed_text_and_answer():
+    budget = budget_for(1000, 300)
+    assert budget.available(FIXED_TEXT) == 1000 - 300 - budget.counter.count(FIXED_TEXT)
+
+
+def test_context_that_fits_is_unchanged():
+    budget = budget_for(1000)
+    packed, packing = budget.pack(CONTEXT, QUERY, FIXED_TEXT)
+    assert packed == CONTEXT
+    assert not packing.trimmed
+    assert packing.sections == 4
+    assert packing.context_tokens == packing.kept_tokens == budget.cost(CONTEXT)
+
+
+def test_lowest_scoring_sections_are_dropped_first():
+    budget = budget_for(1000)
+    costs = [budget.cost(section) for section in SECTIONS]
+    # Room for the two largest sections, not for three
+    room = sum(sorted(costs)[-2:])
+    budget.context_tokens = room + budget.max_new_tokens + budget.counter.count(FIXED_TEXT)
+
+    packed, packing = budget.pack(CONTEXT, QUERY, FIXED_TEXT)
+    assert packing.trimmed and not packing.truncated
+    assert packing.dropped_sections == 2
+    assert packing.kept_tokens <= packing.budget
+    # The section about the query survives, and kept sections stay in document order
+    assert SECTIONS[1] in packed
+    kept = packed.split("\n\n")
+    assert kept == [section for section in SECTIONS if section in kept]
+
+
+def test_single_section_over_budget_is_truncated():
+    budget = budget_for(1000)
+    budget.context_tokens = 8 + budget.max_new_tokens + budget.counter.count(FIXED_TEXT)
+
+    packed, packing = budget.pack(CONTEXT, QUERY, FIXED_TEXT)
+    assert packing.truncated
+    assert packing.dropped_sections == 3
+    assert packing.kept_tokens <= packing.budget
+    assert SECTIONS[1].startswith(packed)
+
+
+def test_truncate_returns_a_prefix_within_the_limit():
+    counter = TokenCounter()
+    text = SECTIONS[1]
+    for limit in range(1, counter.count(text) + 2):
+        prefix = counter.truncate(text, limit)
+        assert text.startswith(prefix)
+        assert counter.count(prefix) <= limit
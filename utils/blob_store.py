@@ -0,0 +1,173 @@
+import hashlib
+import os
+import threading
+import time
+
+from config import Config
+from utils.lru import process_singleton
+from utils.text_cache import file_sha256
+
+
+class BlobStore:
+    """Uploads and outputs stored once under the SHA-256 of their bytes.
+
+    Blobs live at root/<hash[:2]>/<hash>. Every read refreshes a blob's
+    access time; when the store grows past max_bytes the least recently
+    used unreferenced blobs are deleted, and any blob idle for longer than
+    ttl_seconds is deleted even if a reference to it was never released,
+    since Streamlit sessions can disappear without cleaning up.
+    """
+    def __init__(self, root, max_bytes, ttl_seconds):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._refs = {}
+        self._index = None
+        self.evictions = 0
+
+    def put_bytes(self, data):
+        """Store a buffer and return its hash, holding one reference for the caller.
+
+        Identical content is written only once.
+        """
+        digest = hashlib.sha256(memoryview(data)).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = self.temp_path()
+            with open(temp_path, 'wb') as file:
+                file.write(memoryview(data))
+            os.replace(temp_path, path)
+        self._record(digest, path)
+        return digest
+
+    def put_file(self, temp_path):
+        """Move a file written by the caller (see temp_path()) into the store.
+
+        Returns its hash, holding one reference for the caller.
+        """
+        digest = file_sha256(temp_path)
+        path = self._path(digest)
+        if os.path.exists(path):
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        self._record(digest, path)
+        return digest
+
+    def temp_path(self):
+        """Scratch path on the store's filesystem, so put_file() is a rename rather than a copy"""
+        folder = os.path.join(self.root, 'tmp')
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, f"{os.getpid()}.{threading.get_ident()}.{time.time_ns()}.tmp")
+
+    def path(self, digest):
+        """Filesystem path of a blob, or None once it has been evicted"""
+        path = self._path(digest)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._load_index().pop(digest, None)
+            return None
+        with self._lock:
+            index = self._load_index()
+            if digest in index:
+                index[digest] = (index[digest][0], time.time())
+        return path
+
+    def acquire(self, digest):
+        """Pin a blob so quota eviction skips it until release()"""
+        with self._lock:
+            self._refs[digest] = self._refs.get(digest, 0) + 1
+
+    def release(self, digest):
+        with self._lock:
+            count = self._refs.get(digest, 0) - 1
+            if count > 0:
+                self._refs[digest] = count
+            else:
+                self._refs.pop(digest, None)
+        self.evict()
+
+    def evict(self):
+        """Delete expired blobs, then unreferenced ones in LRU order until under the quota"""
+        now = time.time()
+        with self._lock:
+            index = self._load_index()
+            by_age = sorted(index.items(), key=lambda item: item[1][1])
+            total = sum(size for size, _ in index.values())
+            doomed = []
+            for digest, (size, accessed) in by_age:
+                expired = now - accessed > self.ttl_seconds
+                over_quota = total > self.max_bytes and self._refs.get(digest, 0) == 0
+                if expired or over_quota:
+                    doomed.append(digest)
+                    total -= size
+            for digest in doomed:
+                del index[digest]
+                self._refs.pop(digest, None)
+            self.evictions += len(doomed)
+
+        paths = [self._path(digest) for digest in doomed]
+        # Scratch files abandoned by failed edits expire like blobs
+        temp_folder = os.path.join(self.root, 'tmp')
+        if os.path.isdir(temp_folder):
+            for name in os.listdir(temp_folder):
+                path = os.path.join(temp_folder, name)
+                try:
+                    if now - os.stat(path).st_mtime > self.ttl_seconds:
+                        paths.append(path)
+                except OSError:
+                    pass
+
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            index = self._load_index()
+            return {
+                'blobs': len(index),
+                'bytes': sum(size for size, _ in index.values()),
+                'referenced': len(self._refs),
+                'evictions': self.evictions,
+            }
+
+    def _record(self, digest, path):
+        os.utime(path)
+        with self._lock:
+            self._load_index()[digest] = (os.path.getsize(path), time.time())
+            # Pinned before evicting so a blob larger than the free space is not dropped on arrival
+            self._refs[digest] = self._refs.get(digest, 0) + 1
+        self.evict()
+
+    def _load_index(self):
+        """digest -> (size, last access), scanned from disk once per process; caller holds the lock"""
+        if self._index is None:
+            self._index = {}
+            for folder, _, files in os.walk(self.root):
+                if os.path.basename(folder) == 'tmp':
+                    continue
+                for name in files:
+                    try:
+                        stat = os.stat(os.path.join(folder, name))
+                    except OSError:
+                        continue
+                    self._index[name] = (stat.st_size, stat.st_mtime)
+        return self._index
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+
+@process_singleton
+def get_blob_store():
+    """Process-wide blob store shared by every Streamlit session"""
+    config = Config()
+    return BlobStore(config.BLOB_FOLDER, config.BLOB_STORE_MAX_BYTES, config.BLOB_TTL_SECONDS)
@@ -0,0 +1,124 @@
+import hashlib
+
+from config import Config
+from utils.font_metrics import FONT_FILE_KEYS
+from utils.lru import LRUCache, process_singleton
+
+# The pypdf release whose internals install_cmap_cache() patches, as pinned in requirements.txt
+PATCHED_PYPDF_VERSION = '6.20.1'
+
+try:
+    import pypdf
+    from pypdf import _cmap
+except ImportError:
+    pypdf = _cmap = None
+
+try:
+    from pypdf.generic import _font
+except ImportError:
+    _font = None
+
+
+class CMapCache:
+    """Decoded font encodings and ToUnicode maps keyed by a hash of the streams they come from.
+
+    pypdf rebuilds both for every font on every page it extracts; documents
+    from the same generator embed identical fonts, so one decode can serve
+    a whole archive.
+    """
+    def __init__(self, max_fonts):
+        self.max_fonts = max_fonts
+        self._maps = LRUCache(max_fonts)
+
+    def get_encoding(self, font_dict, decode):
+        """Return (encoding, unicode_map) for font_dict, calling decode(font_dict) on a miss"""
+        try:
+            key = font_encoding_key(font_dict)
+        except Exception:
+            # Damaged streams are left to pypdf's own error handling
+            return decode(font_dict)
+
+        encoding, unicode_map = self._maps.get_or_build(key, lambda: decode(font_dict))
+        # Callers are free to modify what they get back, so hand out copies
+        return (dict(encoding) if isinstance(encoding, dict) else encoding), dict(unicode_map)
+
+    def stats(self):
+        stats = self._maps.stats()
+        stats['fonts'] = stats.pop('entries')
+        return stats
+
+
+def font_encoding_key(font_dict):
+    """SHA-256 over everything pypdf derives a font's encoding from.
+
+    That is the font type and name, the /Encoding entry, the ToUnicode
+    stream and, for fonts whose built-in encoding is read from the
+    program itself, the embedded font file.
+    """
+    font_dict = font_dict.get_object()
+    digest = hashlib.sha256()
+    encoding = font_dict.get('/Encoding')
+    digest.update(repr((
+        font_dict.get('/Subtype'),
+        font_dict.get('/BaseFont'),
+        _resolved(encoding),
+    )).encode())
+
+    to_unicode = font_dict.get('/ToUnicode')
+    if to_unicode is not None and hasattr(to_unicode.get_object(), 'get_data'):
+        digest.update(b'ToUnicode')
+        digest.update(to_unicode.get_object().get_data())
+
+    descriptor = font_dict.get('/FontDescriptor')
+    if descriptor is not None:
+        descriptor = descriptor.get_object()
+        for key in FONT_FILE_KEYS:
+            if key in descriptor:
+                digest.update(key.encode())
+                digest.update(descriptor[key].get_object().get_data())
+                break
+    return digest.hexdigest()
+
+
+def _resolved(obj):
+    """Plain Python copy of a PDF object with references followed, so it hashes the same in any document"""
+    if obj is None:
+        return None
+    obj = obj.get_object()
+    if isinstance(obj, dict):
+        return sorted((str(key), _resolved(value)) for key, value in obj.items())
+    if isinstance(obj, list):
+        return [_resolved(item) for item in obj]
+    return repr(obj)
+
+
+_original_get_encoding = _cmap.get_encoding if _cmap is not None else None
+
+
+@process_singleton
+def get_cmap_cache():
+    """Process-wide CMap cache"""
+    return CMapCache(Config().CMAP_CACHE_SIZE)
+
+
+def _cached_get_encoding(font_dict):
+    return get_cmap_cache().get_encoding(font_dict, _original_get_encoding)
+
+
+def install_cmap_cache():
+    """Route pypdf's encoding decoder through the process-wide cache.
+
+    pypdf offers no hook for this, so the module-level get_encoding is
+    replaced in every pypdf module that looks it up: _cmap for
+    build_char_map and generic._font for Font. Other pypdf releases may
+    have moved or changed it, so nothing is patched unless the installed
+    one is PATCHED_PYPDF_VERSION. Safe to call more than once.
+
+    Returns whether pypdf now decodes encodings through the cache.
+    """
+    if _original_get_encoding is None or pypdf.__version__ != PATCHED_PYPDF_VERSION:
+        return False
+    for module in (_cmap, _font):
+        if module is not None and getattr(module, 'get_encoding', None) is _original_get_encoding:
+            module.get_encoding = _cached_get_encoding
+    return True
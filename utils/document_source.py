@@ -0,0 +1,92 @@
+import io
+import mmap
+import os
+import shutil
+
+
+class BufferStream(io.RawIOBase):
+    """Seekable read-only file object over an in-memory buffer.
+
+    Wraps a memoryview so readers pull only the byte ranges they ask for
+    instead of copying the whole upload first.
+    """
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast('B')
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            position = offset
+        elif whence == os.SEEK_CUR:
+            position = self._position + offset
+        else:
+            position = len(self._view) + offset
+        self._position = max(0, position)
+        return self._position
+
+    def readinto(self, buffer):
+        end = min(self._position + len(buffer), len(self._view))
+        size = max(0, end - self._position)
+        buffer[:size] = self._view[self._position:end]
+        self._position += size
+        return size
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            end = len(self._view)
+        else:
+            end = min(self._position + size, len(self._view))
+        data = self._view[self._position:end].tobytes()
+        self._position = max(self._position, end)
+        return data
+
+    def getbuffer(self):
+        return self._view
+
+    def close(self):
+        self._view.release()
+        super().close()
+
+
+def is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+def open_stream(source):
+    """Read-only stream over a document: an mmap for files, a BufferStream for buffers.
+
+    The caller owns the returned stream and must close it once the reader
+    built on top of it is done.
+    """
+    if is_path(source):
+        with open(source, 'rb') as file:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return BufferStream(source)
+
+
+def as_bytes(source):
+    """Bytes for engines that require them, reusing the buffer's own bytes object when possible"""
+    if isinstance(source, bytes):
+        return source
+    view = memoryview(source)
+    if isinstance(view.obj, bytes) and view.contiguous and view.nbytes == len(view.obj):
+        return view.obj
+    return view.tobytes()
+
+
+def write_source(source, output_path):
+    """Copy a document to output_path, using a kernel-side copy for files"""
+    if is_path(source):
+        shutil.copyfile(source, output_path)
+    else:
+        with open(output_path, 'wb') as output_file:
+            output_file.write(memoryview(source))
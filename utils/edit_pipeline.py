@@ -0,0 +1,120 @@
+from collections import namedtuple
+
+from utils.instructions import InstructionStream, REPLACE
+from utils.locator import TargetLocator, hits_by_page
+from utils.text_cache import file_sha256
+
+# What became of one instruction: occurrences found in the text and how many were edited.
+# applied is None until finish() for edits deferred under WINDOWED_EDITS.
+StagedEdit = namedtuple('StagedEdit', ['operation', 'matches', 'applied'])
+
+
+class EditPipeline:
+    """Applies instructions to a document while the LLM is still streaming them.
+
+    Every chunk of the response goes through feed(). Each instruction
+    line it completes is located in the cached page texts and staged on
+    a document opened once up front, so PDF work overlaps generation and
+    finish() only has to write the output after the last token. file_hash,
+    if the caller already knows it, saves hashing the file again. Repeated
+    instructions are skipped, as merge_instructions() would. prepare, if
+    given, may rewrite each located operation before it is staged.
+
+    Instructions see the edits staged before them: once a REPLACE is
+    staged its replacement stands in the page texts, so a later
+    instruction can target it and no longer finds the text it replaced.
+
+    With WINDOWED_EDITS the located operations are collected instead and
+    applied window by window in finish(), keeping memory bounded. They
+    are then applied as one batch, so every instruction is located in
+    the original text.
+    """
+    def __init__(self, processor, pdf_path, output_path, optimize=None, prepare=None, file_hash=None):
+        self.processor = processor
+        self.pdf_path = pdf_path
+        self.output_path = output_path
+        self.optimize = optimize
+        self.prepare = prepare
+        self.file_hash = file_hash or file_sha256(pdf_path)
+        # Read once here rather than hashing the file and walking the cache per instruction
+        self.pages = list(processor.iter_pages(pdf_path, file_hash=self.file_hash))
+        # Pages whose text a staged REPLACE changed; the positional index only describes the original
+        self._rewritten = set()
+        self.stream = InstructionStream()
+        self.results = []
+        self._seen = set()
+        self._deferred = []
+        self.session = None
+        if not processor.config.WINDOWED_EDITS:
+            self.session = processor.begin_edits(pdf_path, output_path, optimize)
+
+    def feed(self, chunk):
+        """Stage the instructions completed by chunk, returning their StagedEdits"""
+        return self._stage_all(self.stream.feed(chunk))
+
+    def finish(self):
+        """Stage the final line, write the output and return every StagedEdit in instruction order"""
+        try:
+            self._stage_all(self.stream.finish())
+            if self.session is not None:
+                self.session.commit()
+            else:
+                self._apply_deferred()
+            return self.results
+        finally:
+            self.close()
+
+    def close(self):
+        """Release the open document; safe to call more than once"""
+        if self.session is not None:
+            self.session.close()
+
+    def _stage_all(self, operations):
+        staged = []
+        for operation in operations:
+            result = self._stage(operation)
+            if result is not None:
+                staged.append(result)
+        return staged
+
+    def _stage(self, operation):
+        key = (operation.kind, operation.target)
+        if key in self._seen:
+            return None
+        self._seen.add(key)
+
+        matches = TargetLocator([operation.target]).match_table(self.pages)
+        applied = 0
+        if matches:
+            if self.prepare is not None:
+                operation = self.prepare(operation)
+            if self.session is not None:
+                original = [match for match in matches if match.page not in self._rewritten]
+                match_rects = self.processor.highlight_rects(self.pdf_path, original, [operation], self.file_hash)
+                applied = self.session.stage([operation], hits_by_page(matches, [operation]), match_rects)[0]
+                if operation.kind == REPLACE and applied:
+                    self._rewrite_pages(operation, {match.page for match in matches})
+            else:
+                self._deferred.append((len(self.results), operation, matches))
+                applied = None
+
+        result = StagedEdit(operation, len(matches), applied)
+        self.results.append(result)
+        return result
+
+    def _rewrite_pages(self, operation, page_numbers):
+        """Carry a staged REPLACE into the page texts later instructions are located in"""
+        self.pages = [
+            (page_number, text.replace(operation.target, operation.replacement) if page_number in page_numbers else text)
+            for page_number, text in self.pages
+        ]
+        self._rewritten.update(page_numbers)
+
+    def _apply_deferred(self):
+        operations = [operation for _, operation, _ in self._deferred]
+        matches = [match for _, _, operation_matches in self._deferred for match in operation_matches]
+        applied = self.processor.apply_edits(
+            self.pdf_path, self.output_path, operations, matches, self.optimize, self.file_hash
+        )
+        for (position, _, _), count in zip(self._deferred, applied):
+            self.results[position] = self.results[position]._replace(applied=count)
@@ -0,0 +1,258 @@
+import hashlib
+import unicodedata
+import weakref
+
+import numpy as np
+from pypdf import _cmap
+
+from config import Config
+from utils.lru import LRUCache, process_singleton
+
+try:
+    from reportlab.pdfbase import pdfmetrics
+except ImportError:
+    pdfmetrics = None
+
+# Glyph widths are stored in thousandths of the font size, as in PDF /Widths arrays
+UNITS_PER_EM = 1000.0
+
+# Width assumed for character codes a font does not describe
+DEFAULT_GLYPH_WIDTH = 500.0
+
+# Single-byte encoding used to turn text back into character codes (WinAnsiEncoding)
+TEXT_ENCODING = 'cp1252'
+
+# Character codes a font does not map decode to U+DC00 plus the code, as Python's surrogateescape does
+UNMAPPED_CODE_BASE = 0xDC00
+
+# /FontDescriptor /Flags bit of fonts whose built-in encoding is not a standard Latin one
+SYMBOLIC_FONT_FLAG = 4
+
+FONT_FILE_KEYS = ('/FontFile', '/FontFile2', '/FontFile3')
+
+# One byte per character code; composite (Type0) and Type 3 fonts are not covered
+SIMPLE_FONT_SUBTYPES = ('/Type1', '/TrueType', '/MMType1')
+
+# Cache keys of fonts already hashed, per open document and object number
+_document_font_keys = weakref.WeakKeyDictionary()
+
+STANDARD_FONTS = {
+    'Courier', 'Courier-Bold', 'Courier-Oblique', 'Courier-BoldOblique',
+    'Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique', 'Helvetica-BoldOblique',
+    'Times-Roman', 'Times-Bold', 'Times-Italic', 'Times-BoldItalic',
+    'Symbol', 'ZapfDingbats',
+}
+
+
+class FontMetrics:
+    """Advance widths of a simple font, one float32 slot per single-byte character code.
+
+    Text is either the font's character codes as bytes or a str, taken as WinAnsi.
+    """
+    def __init__(self, widths):
+        self.widths = widths
+
+    def measure(self, text, font_size):
+        """Width of text in user space units when drawn at font_size"""
+        return float(self.widths[self._codes(text)].sum()) * font_size / UNITS_PER_EM
+
+    def advances(self, text, font_size):
+        """Cumulative widths: element i is the x offset of character i, the last one the total"""
+        positions = np.zeros(len(text) + 1, dtype=np.float32)
+        np.cumsum(self.widths[self._codes(text)], out=positions[1:])
+        return positions * (font_size / UNITS_PER_EM)
+
+    def fit_scale(self, text, font_size, max_width):
+        """Factor (at most 1) by which text must be narrowed to fit max_width"""
+        width = self.measure(text, font_size)
+        if width <= max_width or width == 0:
+            return 1.0
+        return max_width / width
+
+    def _codes(self, text):
+        if isinstance(text, bytes):
+            return np.frombuffer(text, dtype=np.uint8)
+        # 'replace' maps unencodable characters to '?', so codes line up with characters
+        return np.frombuffer(text.encode(TEXT_ENCODING, errors='replace'), dtype=np.uint8)
+
+
+class FontEncoding:
+    """Map between the single-byte character codes of a simple font and the text they show.
+
+    Codes the font does not map decode to lone surrogates and encode back
+    to the same byte, so text can be rewritten around glyphs it does not
+    understand. Only characters in encodable may be written.
+    """
+    def __init__(self, characters, encodable=None):
+        self.characters = characters
+        self._codes = {}
+        for code, character in sorted(characters.items(), reverse=True):
+            self._codes[character] = code
+        self.encodable = set(self._codes) if encodable is None else encodable
+
+    def decode(self, data):
+        return "".join(self.characters.get(code) or chr(UNMAPPED_CODE_BASE + code) for code in data)
+
+    def can_encode(self, text):
+        return all(character in self.encodable for character in text)
+
+    def encode(self, text):
+        """Character codes of text; characters the font does not map become '?'"""
+        return bytes(self._code(character) for character in text)
+
+    def _code(self, character):
+        code = self._codes.get(character)
+        if code is None:
+            code = ord(character) - UNMAPPED_CODE_BASE
+            if not 0 <= code < 256:
+                code = self._codes.get('?', ord('?'))
+        return code
+
+
+class FontMetricsCache:
+    """FontMetrics keyed by font hash, shared across pages and documents"""
+    def __init__(self, max_fonts):
+        self.max_fonts = max_fonts
+        self._fonts = LRUCache(max_fonts)
+
+    def get(self, key, loader):
+        """Return the metrics stored under key, building them with loader() on a miss"""
+        return self._fonts.get_or_build(key, loader)
+
+    def stats(self):
+        stats = self._fonts.stats()
+        stats['fonts'] = stats.pop('entries')
+        return stats
+
+
+def standard_font_metrics(base_font):
+    """Metrics of one of the 14 standard fonts, from reportlab's AFM tables"""
+    cache = get_font_metrics_cache()
+    return cache.get(f"standard:{base_font}", lambda: _load_standard_font(base_font))
+
+
+def pypdf_font_metrics(font_dict):
+    """Metrics of a pypdf font dictionary, or None for composite and Type 3 fonts.
+
+    Embedded fonts are keyed by a hash of their font program and widths,
+    so the same subset reused across pages and documents is parsed once.
+    The key is remembered for each font object of an open document, so
+    later lookups neither read nor hash the font program again.
+    """
+    if font_dict is None:
+        return None
+    reference = _indirect_reference(font_dict)
+    font_dict = font_dict.get_object()
+    if font_dict.get('/Subtype') not in SIMPLE_FONT_SUBTYPES:
+        return None
+
+    if font_dict.get('/Widths') is None:
+        base_font = str(font_dict.get('/BaseFont', '')).lstrip('/')
+        if base_font in STANDARD_FONTS:
+            return standard_font_metrics(base_font)
+        return None
+
+    def load():
+        first_char, widths, missing_width = _pypdf_widths(font_dict)
+        table = np.full(256, missing_width, dtype=np.float32)
+        for code, width in enumerate(widths, start=first_char):
+            if 0 <= code < 256:
+                table[code] = width
+        return FontMetrics(table)
+
+    return get_font_metrics_cache().get(_pypdf_font_key(reference, font_dict), load)
+
+
+def _indirect_reference(font_dict):
+    """Indirect reference a pypdf font dictionary was read through, or None for inline fonts"""
+    if hasattr(font_dict, 'idnum'):
+        return font_dict
+    return getattr(font_dict, 'indirect_reference', None)
+
+
+def _pypdf_font_key(reference, font_dict):
+    if reference is None or reference.pdf is None:
+        return _hash_pypdf_font(font_dict)
+    keys = _document_font_keys.setdefault(reference.pdf, {})
+    number = (reference.idnum, reference.generation)
+    if number not in keys:
+        keys[number] = _hash_pypdf_font(font_dict)
+    return keys[number]
+
+
+def _pypdf_widths(font_dict):
+    """(first char, widths, missing width) of a simple font"""
+    widths = [float(width.get_object()) for width in font_dict['/Widths'].get_object()]
+    first_char = int(font_dict.get('/FirstChar', 0))
+    descriptor = font_dict.get('/FontDescriptor')
+    descriptor = descriptor.get_object() if descriptor is not None else {}
+    missing_width = float(descriptor.get('/MissingWidth', 0)) or DEFAULT_GLYPH_WIDTH
+    return first_char, widths, missing_width
+
+
+def _hash_pypdf_font(font_dict):
+    base_font = str(font_dict.get('/BaseFont', '')).lstrip('/')
+    digest = hashlib.sha256(repr((base_font,) + _pypdf_widths(font_dict)).encode())
+    descriptor = font_dict.get('/FontDescriptor')
+    descriptor = descriptor.get_object() if descriptor is not None else {}
+    for key in FONT_FILE_KEYS:
+        if key in descriptor:
+            # The stream as stored in the file; decoding the font program is not needed to tell fonts apart
+            digest.update(descriptor[key].get_object()._data)
+            break
+    return digest.hexdigest()
+
+
+def pypdf_font_encoding(font_dict, drawn_codes=()):
+    """FontEncoding of a pypdf font dictionary, or None if its codes cannot be mapped to text.
+
+    Codes are read from /Encoding, its /Differences and /ToUnicode. Subset
+    fonts only carry the glyphs a document uses, so only the characters
+    of drawn_codes, the codes already shown in the font, may be written.
+    """
+    if font_dict is None:
+        return None
+    font_dict = font_dict.get_object()
+    if font_dict.get('/Subtype') not in SIMPLE_FONT_SUBTYPES:
+        return None
+
+    base_font = str(font_dict.get('/BaseFont', '')).lstrip('/')
+    encoding, to_unicode = _cmap.get_encoding(font_dict)
+    if not isinstance(encoding, dict):
+        return None
+    descriptor = font_dict.get('/FontDescriptor')
+    flags = int(descriptor.get_object().get('/Flags', 0)) if descriptor is not None else 0
+    if flags & SYMBOLIC_FONT_FLAG and '/Encoding' not in font_dict and base_font not in STANDARD_FONTS:
+        # The codes follow the font program's own encoding, which only /ToUnicode describes
+        encoding = {}
+
+    characters = {code: character for code, character in encoding.items() if _is_printable(character)}
+    for code, text in to_unicode.items():
+        if isinstance(code, str) and len(code) == 1 and ord(code) < 256:
+            if _is_printable(text):
+                characters[ord(code)] = text
+            else:
+                characters.pop(ord(code), None)
+    if not characters:
+        return None
+
+    if base_font[6:7] == '+':
+        return FontEncoding(characters, {characters[code] for code in set(drawn_codes) if code in characters})
+    return FontEncoding(characters)
+
+
+def _is_printable(text):
+    """Whether text is one character that is not a control code"""
+    return isinstance(text, str) and len(text) == 1 and unicodedata.category(text) != 'Cc'
+
+
+def _load_standard_font(base_font):
+    if pdfmetrics is None:
+        return FontMetrics(np.full(256, DEFAULT_GLYPH_WIDTH, dtype=np.float32))
+    return FontMetrics(np.asarray(pdfmetrics.getFont(base_font).widths, dtype=np.float32))
+
+
+@process_singleton
+def get_font_metrics_cache():
+    """Process-wide font metrics cache"""
+    return FontMetricsCache(Config().FONT_METRICS_CACHE_SIZE)
@@ -0,0 +1,44 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+from utils.lru import process_singleton
+
+_local = threading.local()
+
+
+@process_singleton
+def _shared_adapter():
+    """One connection pool for the whole process; urllib3's pool manager is thread-safe"""
+    config = Config()
+    # Retries are decided by the caller, not hidden inside the adapter
+    return HTTPAdapter(
+        pool_connections=config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=config.HTTP_POOL_MAXSIZE,
+        max_retries=0
+    )
+
+
+def get_http_session():
+    """requests.Session for the calling thread, backed by the shared keep-alive pool.
+
+    Sessions themselves are not thread-safe, so each Streamlit script
+    thread gets its own, but they all mount the same adapter and so reuse
+    the same open TCP/TLS connections.
+    """
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = _shared_adapter()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _local.session = session
+    return session
+
+
+def http_timeout():
+    """(connect, read) timeout in seconds for outgoing API calls"""
+    config = Config()
+    return (config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT)
@@ -0,0 +1,127 @@
+import re
+import struct
+
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    StreamObject,
+)
+
+STARTXREF_PATTERN = re.compile(rb'startxref\s+(\d+)')
+
+# startxref and %%EOF must sit in the last 1024 bytes of a conforming file
+TAIL_SIZE = 1024
+
+
+class IncrementalUpdate:
+    """Collects new and modified objects of a pypdf reader and appends them as one update.
+
+    Unlike PdfWriter(incremental=True), nothing is cloned or fingerprinted:
+    only objects explicitly added or marked modified are written, followed
+    by a cross-reference stream whose /Prev chains to the previous section.
+    """
+    def __init__(self, reader):
+        self.reader = reader
+        self._first_new_id = self._next_id = int(reader.trailer['/Size'])
+        self._objects = {}
+
+    def add_object(self, obj):
+        """Register a new object and return a reference to it"""
+        # References resolve through this update, so a page can be edited again before write()
+        reference = IndirectObject(self._next_id, 0, self)
+        self._next_id += 1
+        self._objects[reference.idnum] = (0, obj)
+        return reference
+
+    def get_object(self, reference):
+        """Resolve a reference to a new object of this update, or else through the reader"""
+        if reference.idnum >= self._first_new_id and reference.idnum in self._objects:
+            return self._objects[reference.idnum][1]
+        return self.reader.get_object(reference)
+
+    def mark_modified(self, obj):
+        """Rewrite an existing indirect object under its own number"""
+        reference = obj.indirect_reference
+        self._objects[reference.idnum] = (reference.generation, obj)
+
+    def add_annotation(self, page, annotation):
+        annotations = page.get('/Annots')
+        annotations = ArrayObject(annotations.get_object() if annotations is not None else [])
+        annotations.append(self.add_object(annotation))
+        page[NameObject('/Annots')] = annotations
+        self.mark_modified(page)
+
+    def replace_contents(self, page, content):
+        # get_data() re-serialises edited operations; the parsed stream's own buffer is stale
+        stream = DecodedStreamObject()
+        stream.set_data(content.get_data())
+        page[NameObject('/Contents')] = self.add_object(stream.flate_encode())
+        self.mark_modified(page)
+
+    def write(self, stream):
+        """Append the update to stream, which must be positioned at the end of the file"""
+        if not self._objects:
+            return
+
+        positions = {}
+        for idnum in sorted(self._objects):
+            generation, obj = self._objects[idnum]
+            positions[idnum] = (stream.tell(), generation)
+            stream.write(f"{idnum} {generation} obj\n".encode())
+            obj.write_to_stream(stream)
+            stream.write(b"\nendobj\n")
+
+        xref_id = self._next_id
+        xref_location = stream.tell()
+        positions[xref_id] = (xref_location, 0)
+
+        offset_width = 4 if xref_location < 2 ** 32 else 8
+        offset_format = '>I' if offset_width == 4 else '>Q'
+        rows = b"".join(
+            b"\x01" + struct.pack(offset_format, position) + struct.pack('>H', generation)
+            for position, generation in (positions[idnum] for idnum in sorted(positions))
+        )
+
+        trailer = {
+            NameObject('/Type'): NameObject('/XRef'),
+            NameObject('/Size'): NumberObject(xref_id + 1),
+            NameObject('/Root'): self.reader.trailer.raw_get('/Root'),
+            NameObject('/Prev'): NumberObject(self._previous_xref()),
+            NameObject('/Index'): ArrayObject(NumberObject(n) for n in self._index(sorted(positions))),
+            NameObject('/W'): ArrayObject([NumberObject(1), NumberObject(offset_width), NumberObject(2)]),
+            NameObject('/Filter'): NameObject('/FlateDecode'),
+            '__streamdata__': b"",
+        }
+        for key in ('/Info', '/ID'):
+            if key in self.reader.trailer:
+                trailer[NameObject(key)] = self.reader.trailer.raw_get(key)
+
+        xref = StreamObject.initialize_from_dictionary(trailer)
+        xref.set_data(rows)
+        stream.write(f"{xref_id} 0 obj\n".encode())
+        xref.write_to_stream(stream)
+        stream.write(f"\nendobj\nstartxref\n{xref_location}\n%%EOF\n".encode())
+
+    def _previous_xref(self):
+        """Offset of the newest existing cross-reference section"""
+        stream = self.reader.stream
+        stream.seek(0, 2)
+        size = stream.tell()
+        stream.seek(max(0, size - TAIL_SIZE))
+        matches = STARTXREF_PATTERN.findall(stream.read(TAIL_SIZE))
+        if not matches:
+            raise Exception("startxref not found; cannot append an incremental update")
+        return int(matches[-1])
+
+    def _index(self, ids):
+        """Flatten sorted object numbers into [first, count, ...] subsection pairs"""
+        index = []
+        for idnum in ids:
+            if index and index[-2] + index[-1] == idnum:
+                index[-1] += 1
+            else:
+                index.extend([idnum, 1])
+        return index
@@ -0,0 +1,74 @@
+from collections import namedtuple
+
+REPLACE = 'replace'
+HIGHLIGHT = 'highlight'
+
+# A single edit requested by the LLM. `replacement` is None for highlights.
+EditOperation = namedtuple('EditOperation', ['kind', 'target', 'replacement'])
+
+
+def parse_instruction_line(line):
+    """Parse one 'REPLACE: a -> b' or 'HIGHLIGHT: x' line into an EditOperation"""
+    if 'REPLACE:' in line and '->' in line:
+        old_text, new_text = line.split('->', 1)
+        old_text = old_text.replace('REPLACE:', '').strip()
+        new_text = new_text.strip()
+        if old_text:
+            return EditOperation(REPLACE, old_text, new_text)
+    elif 'HIGHLIGHT:' in line:
+        text_to_highlight = line.replace('HIGHLIGHT:', '').strip()
+        if text_to_highlight:
+            return EditOperation(HIGHLIGHT, text_to_highlight, None)
+    return None
+
+
+def parse_instructions(instructions):
+    """Parse the full LLM output into a list of EditOperations, in order"""
+    operations = []
+    for line in instructions.split('\n'):
+        operation = parse_instruction_line(line)
+        if operation:
+            operations.append(operation)
+    return operations
+
+
+class InstructionStream:
+    """parse_instructions() for text that arrives in pieces, such as a streamed LLM response"""
+    def __init__(self):
+        self._partial = ""
+
+    def feed(self, chunk):
+        """Add a piece of the response and return the operations of every line it completed"""
+        lines = (self._partial + chunk).split('\n')
+        self._partial = lines.pop()
+        return [operation for operation in map(parse_instruction_line, lines) if operation]
+
+    def finish(self):
+        """Operation of the final, unterminated line, once the response is complete"""
+        line, self._partial = self._partial, ""
+        operation = parse_instruction_line(line)
+        return [operation] if operation else []
+
+
+def format_instruction(operation):
+    """Render an EditOperation back into the line format parse_instruction_line() reads"""
+    if operation.kind == REPLACE:
+        return f"REPLACE: {operation.target} -> {operation.replacement}"
+    return f"HIGHLIGHT: {operation.target}"
+
+
+def merge_instructions(plans):
+    """Concatenate several operation lists, keeping the first edit of each kind per target.
+
+    A later REPLACE of a target the plan already replaces could never
+    match, so it is dropped along with exact duplicates.
+    """
+    merged = []
+    seen = set()
+    for operations in plans:
+        for operation in operations:
+            key = (operation.kind, operation.target)
+            if key not in seen:
+                seen.add(key)
+                merged.append(operation)
+    return merged
@@ -1,17 +1,90 @@
 
-from utils.huggingface_integration import HuggingFaceIntegration
+from concurrent.futures import ThreadPoolExecutor
+from utils.llm_providers import get_provider
+from utils.instructions import parse_instructions, format_instruction, merge_instructions
+from utils.retrieval import Chunk, format_context
 from config import Config
 
+INSTRUCTION_PROMPT = """
+Analyze this PDF content and provide specific instructions for modification based on: {prompt}
+
+Return instructions in this format:
+REPLACE: [old_text] -> [new_text]
+HIGHLIGHT: [text_to_highlight]
+"""
+
 class LLMIntegration:
     def __init__(self):
         self.config = Config()
-        self.hf_integration = HuggingFaceIntegration()
+        self.provider = get_provider(self.config.LLM_PROVIDER)
     
     def generate_text(self, prompt, context_text=None):
-        """Generate text using Hugging Face"""
-        return self.hf_integration.generate_text(prompt, context_text)
+        """Generate text using the configured LLM_PROVIDER"""
+        return self.provider.generate_text(prompt, context_text)
+    
+    def generate_instructions(self, prompt, context_text):
+        """Ask for REPLACE/HIGHLIGHT instruction lines implementing prompt on context_text.
+        
+        Returns the instruction text and the ContextPacking telling how much
+        of context_text had to be left out to fit the model window.
+        """
+        return self.provider.generate(INSTRUCTION_PROMPT.format(prompt=prompt), context_text)
+    
+    def stream_instructions(self, prompt, context_text):
+        """Streaming generate_instructions(): (chunks, packing), chunks yielding the text as it arrives"""
+        return self.provider.generate_stream(INSTRUCTION_PROMPT.format(prompt=prompt), context_text)
+    
+    def plan_edits(self, prompt, pages, window_pages=None, max_workers=None):
+        """Map-reduce instruction generation over a whole document.
+        
+        pages yields (page_number, text). Consecutive pages are grouped into
+        windows that fill the model's context budget (capped at window_pages
+        pages when that is positive), and every window is planned by its
+        own request, at most max_workers at a time. The per-window
+        instructions are merged in page order without duplicates. Returns
+        the merged instruction text, the number of windows whose request
+        failed (raises if all of them did) and the number whose pages still
+        had to be trimmed, which only happens to single pages over budget.
+        """
+        window_pages = window_pages or self.config.PLANNER_WINDOW_PAGES
+        max_workers = max_workers or self.config.PLANNER_CONCURRENCY
+        budget = self.provider.context_budget(INSTRUCTION_PROMPT.format(prompt=prompt))
+        
+        windows = []
+        used = 0
+        for page_number, text in pages:
+            if not text.strip():
+                continue
+            chunk = Chunk(page_number, text)
+            cost = self.provider.token_budget.cost(format_context([chunk]))
+            # A window is never empty, so a window_pages of 0 never closes one
+            if not windows or used + cost > budget or len(windows[-1]) == window_pages:
+                windows.append([])
+                used = 0
+            windows[-1].append(chunk)
+            used += cost
+        if not windows:
+            return "", 0, 0
+        
+        def plan_window(window):
+            try:
+                instructions, packing = self.generate_instructions(prompt, format_context(window))
+                return (parse_instructions(instructions), packing.trimmed), None
+            except Exception as e:
+                return None, e
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(windows))) as pool:
+            results = list(pool.map(plan_window, windows))
+        
+        errors = [error for _, error in results if error is not None]
+        if len(errors) == len(results):
+            raise errors[0]
+        
+        planned = [result for result, _ in results if result is not None]
+        merged = merge_instructions(operations for operations, _ in planned)
+        trimmed = sum(1 for _, window_trimmed in planned if window_trimmed)
+        return "\n".join(format_instruction(op) for op in merged), len(errors), trimmed
     
     def humanize_text(self, text):
         """Humanize AI-generated text"""
-        return self.hf_integration.humanize_text(text)
-EOL
\ No newline at end of file
+        return self.provider.humanize_text(text)
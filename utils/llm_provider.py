@@ -0,0 +1,265 @@
+import json
+import requests
+from config import Config
+from utils.http_pool import get_http_session, http_timeout
+from utils.response_cache import ResponseCache, get_response_cache
+from utils.retry_policy import RetryPolicy, RetryableError
+from utils.token_budget import TokenBudget
+
+# Model loading (503), rate limiting (429) and gateway hiccups are worth retrying
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+CONTEXT_TEMPLATE = "Context: {context}\n\nInstruction: {prompt}"
+
+# Event streams are read in small pieces so each token is seen as soon as it arrives
+STREAM_READ_BYTES = 64
+
+class LLMProvider:
+    """Interface every inference provider behind LLMIntegration implements.
+    
+    Prompt packing, response caching, retries and streaming are shared;
+    providers set api_url, api_key and model and adapt the wire format.
+    The defaults speak the text-generation-inference protocol, which the
+    Hugging Face Inference API also uses.
+    """
+    name = None
+    title = None
+    requires_api_key = False
+    
+    def __init__(self):
+        self.config = Config()
+        self.api_key = None
+        self.model = None
+        self.api_url = None
+        self.retry_policy = RetryPolicy.from_config()
+        # Only greedy answers are reproducible, so sampled ones are cached only when asked to
+        cacheable = self.config.LLM_DETERMINISTIC or self.config.LLM_CACHE_SAMPLED
+        self.response_cache = get_response_cache() if self.config.LLM_CACHE and cacheable else None
+        self.token_budget = TokenBudget.from_config()
+        
+    def generate_text(self, prompt, context_text=None):
+        """Generate text for prompt, with context_text packed in front of it"""
+        return self.generate(prompt, context_text)[0]
+    
+    def generate(self, prompt, context_text=None):
+        """Generate text, returning it with the ContextPacking of context_text (None without context).
+        
+        The context is packed into whatever the model window leaves beside
+        the prompt and max_new_tokens, dropping the least relevant pages
+        first, so an oversized request is trimmed here rather than rejected
+        or cut server-side after paying for the upload.
+        """
+        try:
+            full_prompt, packing = self._build_prompt(prompt, context_text)
+            return self._query(full_prompt), packing
+        except Exception as e:
+            raise Exception(f"{self.title} generation failed: {str(e)}")
+    
+    def generate_stream(self, prompt, context_text=None):
+        """Streaming generate(): returns (chunks, packing), chunks yielding the response as it is produced.
+        
+        Tokens arrive as server-sent events, so the first words can be shown
+        long before the answer is complete; joined, the chunks make up the
+        same text generate() returns. The request is sent when iteration
+        starts.
+        """
+        try:
+            full_prompt, packing = self._build_prompt(prompt, context_text)
+        except Exception as e:
+            raise Exception(f"{self.title} generation failed: {str(e)}")
+        return self._stream(full_prompt), packing
+    
+    def context_budget(self, prompt):
+        """Tokens of context that fit beside prompt in one request"""
+        return self.token_budget.available(CONTEXT_TEMPLATE.format(context="", prompt=prompt))
+    
+    def _build_prompt(self, prompt, context_text):
+        """Full prompt text and the ContextPacking of context_text (None without context)"""
+        fixed_text = CONTEXT_TEMPLATE.format(context="", prompt=prompt) if context_text else prompt
+        if self.token_budget.available(fixed_text) < 0:
+            raise Exception(
+                f"prompt needs {self.token_budget.counter.count(fixed_text)} tokens, more than the "
+                f"{self.token_budget.context_tokens}-token window leaves beside {self.token_budget.max_new_tokens} new tokens"
+            )
+        
+        if not context_text:
+            return prompt, None
+        context_text, packing = self.token_budget.pack(context_text, prompt, fixed_text)
+        return CONTEXT_TEMPLATE.format(context=context_text, prompt=prompt), packing
+    
+    def _headers(self):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+    
+    def _payload(self, prompt, parameters, stream):
+        """Request body for the inference endpoint"""
+        payload = {
+            "inputs": prompt,
+            "parameters": parameters
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+    
+    def _query(self, prompt):
+        """Complete prompt in one request"""
+        headers = self._headers()
+        parameters = self._generation_parameters()
+        payload = self._payload(prompt, parameters, stream=False)
+        
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = ResponseCache.key(self.name, self.api_url, self.model, parameters, prompt)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        result = self.retry_policy.run(lambda remaining: self._post(headers, payload, remaining))
+        text = self._result_text(result)
+        
+        if cache_key is not None:
+            self.response_cache.put(cache_key, text)
+        return text
+    
+    def _stream(self, prompt):
+        """Yield response text chunks; cached answers, or all of them when LLM_STREAMING is off, come whole"""
+        try:
+            if not self.config.LLM_STREAMING:
+                yield self._query(prompt)
+                return
+            
+            headers = self._headers()
+            parameters = self._generation_parameters()
+            payload = self._payload(prompt, parameters, stream=True)
+            
+            cache_key = None
+            if self.response_cache is not None:
+                cache_key = ResponseCache.key(self.name, self.api_url, self.model, parameters, prompt)
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    yield cached
+                    return
+            
+            # Only opening the stream is retried; once tokens flow a failure is final
+            response = self.retry_policy.run(lambda remaining: self._post(headers, payload, remaining, stream=True))
+            pieces = []
+            try:
+                if response.headers.get('Content-Type', '').startswith('text/event-stream'):
+                    for piece in self._stream_events(response):
+                        if not pieces:
+                            piece = piece.lstrip()
+                            if not piece:
+                                continue
+                        pieces.append(piece)
+                        yield piece
+                else:
+                    # Servers without streaming support answer with the whole result
+                    pieces.append(self._result_text(response.json()))
+                    yield pieces[0]
+            finally:
+                response.close()
+            
+            if cache_key is not None:
+                self.response_cache.put(cache_key, "".join(pieces).strip())
+        except Exception as e:
+            raise Exception(f"{self.title} generation failed: {str(e)}")
+    
+    def _event_data(self, response):
+        """Payloads of the data: lines of a server-sent event stream"""
+        # SSE is UTF-8 by definition; requests would otherwise guess ISO-8859-1
+        response.encoding = 'utf-8'
+        for line in response.iter_lines(chunk_size=STREAM_READ_BYTES, decode_unicode=True):
+            if line and line.startswith('data:'):
+                yield line[len('data:'):].strip()
+    
+    def _stream_events(self, response):
+        """Token texts from a text-generation-inference server-sent event stream"""
+        for data in self._event_data(response):
+            event = json.loads(data)
+            if 'error' in event:
+                raise Exception(f"{self.title} API error: {event['error']}")
+            token = event.get('token') or {}
+            if token.get('text') and not token.get('special'):
+                yield token['text']
+    
+    def _result_text(self, result):
+        """Generated text from a non-streaming response"""
+        if isinstance(result, list) and len(result) > 0:
+            if 'generated_text' in result[0]:
+                return result[0]['generated_text'].strip()
+            # Try to extract text from different response formats
+            return str(result[0]).strip()
+        if isinstance(result, dict) and 'generated_text' in result:
+            return result['generated_text'].strip()
+        return str(result)
+    
+    def _generation_parameters(self):
+        """Sampling by default; greedy decoding when LLM_DETERMINISTIC is set, so cached answers are the answer"""
+        parameters = {
+            "max_new_tokens": self.token_budget.max_new_tokens,
+            "return_full_text": False
+        }
+        if self.config.LLM_DETERMINISTIC:
+            parameters["do_sample"] = False
+        else:
+            parameters["temperature"] = 0.7
+            parameters["do_sample"] = True
+        return parameters
+    
+    def _post(self, headers, payload, remaining, stream=False):
+        """One attempt at the inference call, raising RetryableError for transient failures.
+        
+        Returns the decoded JSON, or with stream=True the open response.
+        """
+        connect_timeout, read_timeout = http_timeout()
+        try:
+            # Connections are pooled process-wide, so new instances reuse warm sockets
+            response = get_http_session().post(
+                self.api_url,
+                headers=headers,
+                json=payload,
+                stream=stream,
+                timeout=(connect_timeout, max(0.1, min(read_timeout, remaining)))
+            )
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            raise RetryableError(f"{self.title} API unreachable: {str(e)}")
+        
+        if response.status_code in RETRY_STATUS_CODES:
+            raise RetryableError(
+                f"{self.title} API returned {response.status_code}",
+                retry_after=self._retry_after(response)
+            )
+        
+        try:
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"{self.title} API error: {str(e)}")
+        return response if stream else response.json()
+    
+    def _retry_after(self, response):
+        """Seconds the server asked us to wait: estimated_time while a model loads, else Retry-After"""
+        try:
+            estimated_time = response.json().get('estimated_time')
+            if estimated_time is not None:
+                return float(estimated_time)
+        except (ValueError, AttributeError):
+            pass
+        try:
+            return float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return None
+    
+    def humanize_text(self, text):
+        """Humanize AI-generated text to avoid detection"""
+        humanization_prompt = f"""
+        Rewrite the following text to make it sound more human and natural while preserving the original meaning. 
+        Use varied sentence structures, natural phrasing, and avoid repetitive patterns.
+        
+        Text to humanize: {text}
+        
+        Provide only the humanized version:
+        """
+        
+        return self.generate_text(humanization_prompt)
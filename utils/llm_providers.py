@@ -0,0 +1,20 @@
+from utils.huggingface_integration import HuggingFaceIntegration
+from utils.local_inference import LocalInferenceProvider
+
+PROVIDERS = {
+    HuggingFaceIntegration.name: HuggingFaceIntegration,
+    LocalInferenceProvider.name: LocalInferenceProvider,
+}
+
+
+def get_provider_class(name):
+    """Look up an inference provider class by its registry name"""
+    try:
+        return PROVIDERS[name.lower()]
+    except KeyError:
+        raise Exception(f"Unknown LLM provider '{name}'. Choose one of: {', '.join(PROVIDERS)}")
+
+
+def get_provider(name):
+    """Instantiate an inference provider by its registry name"""
+    return get_provider_class(name)()
@@ -0,0 +1,61 @@
+import json
+from utils.llm_provider import LLMProvider
+
+OPENAI_API = 'openai'
+TGI_API = 'tgi'
+LOCAL_APIS = (OPENAI_API, TGI_API)
+
+class LocalInferenceProvider(LLMProvider):
+    """Model served on our own hosts by an OpenAI-compatible or text-generation-inference server.
+    
+    llama.cpp's server, vLLM and Ollama expose /v1/completions; a TGI
+    router takes the Inference API payload at its root. Either way there
+    is no public queue in front of the model.
+    """
+    name = 'local'
+    title = 'Local inference'
+    requires_api_key = False
+    
+    def __init__(self):
+        super().__init__()
+        self.api = self.config.LOCAL_LLM_API.lower()
+        if self.api not in LOCAL_APIS:
+            raise Exception(f"Unknown local inference API '{self.api}'. Choose one of: {', '.join(LOCAL_APIS)}")
+        self.api_key = self.config.LOCAL_LLM_API_KEY
+        self.model = self.config.LOCAL_LLM_MODEL or self.config.HUGGINGFACE_MODEL
+        base_url = self.config.LOCAL_LLM_URL.rstrip('/')
+        self.api_url = f"{base_url}/v1/completions" if self.api == OPENAI_API else base_url
+    
+    def _payload(self, prompt, parameters, stream):
+        if self.api == TGI_API:
+            return super()._payload(prompt, parameters, stream)
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "max_tokens": parameters["max_new_tokens"],
+            # OpenAI-style servers decode greedily at temperature 0
+            "temperature": parameters.get("temperature", 0.0),
+            "stream": stream
+        }
+    
+    def _result_text(self, result):
+        if self.api == TGI_API:
+            return super()._result_text(result)
+        choices = result.get('choices') if isinstance(result, dict) else None
+        if not choices:
+            raise Exception(f"Unexpected response from the local server: {str(result)[:200]}")
+        return (choices[0].get('text') or "").strip()
+    
+    def _stream_events(self, response):
+        if self.api == TGI_API:
+            yield from super()._stream_events(response)
+            return
+        for data in self._event_data(response):
+            if data == '[DONE]':
+                return
+            event = json.loads(data)
+            if 'error' in event:
+                raise Exception(f"{self.title} API error: {event['error']}")
+            choices = event.get('choices') or []
+            if choices and choices[0].get('text'):
+                yield choices[0]['text']
@@ -0,0 +1,107 @@
+from collections import deque, namedtuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# One occurrence of an instruction target in the extracted text of a page
+Match = namedtuple('Match', ['target', 'page', 'offset'])
+
+
+class TargetLocator:
+    """Aho-Corasick automaton over every instruction target of a plan.
+
+    All targets are found in a single left-to-right pass over each page,
+    so search cost depends on the document size, not the number of
+    instructions. Uses pyahocorasick when installed, otherwise a
+    pure-Python automaton.
+    """
+    def __init__(self, targets):
+        self.targets = list(dict.fromkeys(t for t in targets if t))
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for target in self.targets:
+                self._automaton.add_word(target, target)
+            if self.targets:
+                self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            self._build()
+
+    def find(self, text):
+        """Yield (target, offset) for every occurrence, overlapping ones included"""
+        if not self.targets:
+            return
+        if len(self.targets) == 1:
+            # A single target needs no automaton; str.find scans in C
+            target = self.targets[0]
+            offset = text.find(target)
+            while offset != -1:
+                yield target, offset
+                offset = text.find(target, offset + 1)
+            return
+        if self._automaton is not None:
+            for end, target in self._automaton.iter(text):
+                yield target, end - len(target) + 1
+            return
+
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for target in output[state]:
+                yield target, position - len(target) + 1
+
+    def match_table(self, pages):
+        """Scan (page_number, text) pairs once and return a list of Matches"""
+        return [
+            Match(target, page_number, offset)
+            for page_number, text in pages
+            for target, offset in self.find(text)
+        ]
+
+    def _build(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for target in self.targets:
+            state = 0
+            for char in target:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append(target)
+
+        # Breadth-first so every failure link points at an already finished state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+
+def hits_by_page(matches, operations):
+    """Group a match table into {page_number: [operation indices]} for the edit engine"""
+    indices = {}
+    for i, op in enumerate(operations):
+        indices.setdefault(op.target, []).append(i)
+
+    pages = {}
+    for match in matches:
+        page_hits = pages.setdefault(match.page, [])
+        for i in indices.get(match.target, ()):
+            if i not in page_hits:
+                page_hits.append(i)
+    return pages
@@ -0,0 +1,84 @@
+import functools
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that drops the least recently used entry when full.
+
+    The lock is held only around the dictionary itself, so values are
+    built, loaded or saved by the caller without blocking other threads.
+    hits and misses count get() and get_or_build() lookups.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the value stored under key, or None, marking it most recently used"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def get_or_build(self, key, build):
+        """Return the value stored under key, storing build() on a miss.
+
+        build runs outside the lock; two threads missing the same key may
+        both call it, and the later result is kept.
+        """
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+            }
+
+
+def process_singleton(create):
+    """Turn create() into an accessor that builds its object on first call and returns it thereafter"""
+    instances = []
+    lock = threading.Lock()
+
+    @functools.wraps(create)
+    def get():
+        with lock:
+            if not instances:
+                instances.append(create())
+            return instances[0]
+
+    return get
@@ -0,0 +1,724 @@
+import re
+
+from pypdf import DocumentInformation, PdfReader, PdfWriter
+from pypdf.annotations import Highlight
+from pypdf.generic import ArrayObject, ByteStringObject, ContentStream, FloatObject, TextStringObject
+
+from utils.document_source import as_bytes, is_path, open_stream, write_source
+from utils.font_metrics import pypdf_font_encoding, pypdf_font_metrics, standard_font_metrics
+from utils.incremental_writer import IncrementalUpdate
+from utils.instructions import REPLACE, HIGHLIGHT
+from utils.locator import TargetLocator, hits_by_page
+
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
+# Optional: MuPDF subsets embedded fonts with fontTools for the 'small' preset
+try:
+    import fontTools
+except ImportError:
+    fontTools = None
+
+# Average glyph width as a fraction of the font size, for fonts without usable metrics
+AVERAGE_CHAR_WIDTH = 0.5
+
+# Longer replacements are narrowed with Tz down to this fraction, then allowed to overflow
+MIN_HORIZONTAL_SCALE = 0.5
+
+# Longer replacements are drawn smaller to fit the old text's width down to this size, then allowed to overflow
+MIN_REPLACEMENT_FONT_SIZE = 4
+
+TEXT_SHOW_OPERATORS = (b'Tj', b"'", b'"')
+
+# A string or array operand immediately followed by a text-showing operator
+TEXT_SHOW_PATTERN = re.compile(rb'[)>\]]\s*(?:Tj|TJ|\'|")')
+
+# Output optimization presets for full rewrites
+OPTIMIZE_NONE = 'none'
+OPTIMIZE_FAST = 'fast'
+OPTIMIZE_SMALL = 'small'
+OPTIMIZE_PRESETS = (OPTIMIZE_NONE, OPTIMIZE_FAST, OPTIMIZE_SMALL)
+
+# MuPDF save() options per preset
+PYMUPDF_SAVE_OPTIONS = {
+    # Still leave out objects nothing references, such as applied redactions, as pypdf's writer does;
+    # that is quicker than writing them
+    OPTIMIZE_NONE: {'garbage': 1},
+    # Drop unreferenced objects, renumbering the rest so their xref slots go too, and compress uncompressed streams
+    OPTIMIZE_FAST: {'garbage': 2, 'deflate': True},
+    # Also merge duplicate objects and streams and recompress images and fonts
+    OPTIMIZE_SMALL: {'garbage': 4, 'deflate': True, 'deflate_images': True, 'deflate_fonts': True},
+}
+
+
+class PDFBackend:
+    """Interface every PDF engine behind PDFProcessor implements"""
+    name = None
+
+    def open(self, pdf_path):
+        """Open a document and return an engine-specific handle.
+
+        pdf_path may also be a bytes-like buffer such as an upload's
+        memoryview. Files are memory-mapped or streamed rather than read
+        into Python memory, and pages are resolved lazily from the xref.
+        """
+        raise NotImplementedError
+
+    def close(self, doc):
+        """Release a handle returned by open()"""
+        raise NotImplementedError
+
+    def page_count(self, doc):
+        raise NotImplementedError
+
+    def page_text(self, doc, index):
+        """Extract the plain text of one page"""
+        raise NotImplementedError
+
+    def search(self, doc, index, text):
+        """Return (x0, y0, x1, y1) boxes of every occurrence of text on a page"""
+        raise NotImplementedError
+
+    def page_words(self, doc, index):
+        """Return (x0, y0, x1, y1, word) for every word on a page, in reading order"""
+        raise NotImplementedError
+
+    def apply_edits(self, pdf_path, output_path, operations, incremental=False, page_hits=None,
+                    match_rects=None, optimize=OPTIMIZE_FAST):
+        """Apply all operations in one read/write pass, returning per-operation match counts.
+
+        page_hits maps page numbers to the indices of operations found on
+        them; when omitted the backend locates the targets itself.
+        match_rects optionally maps page -> operation index -> one list of
+        line rectangles per match, used to place highlights without
+        re-walking the page. With incremental=True the output is the
+        original bytes followed by an appended update section holding
+        only new or modified objects.
+        optimize picks one of OPTIMIZE_PRESETS for full rewrites: 'fast'
+        compresses what the edit touched and drops orphaned objects,
+        'small' also merges identical objects and recompresses every
+        stream. Incremental updates append only and ignore it.
+        """
+        session = self.begin_edits(pdf_path, output_path, incremental, optimize)
+        try:
+            applied = session.stage(operations, page_hits, match_rects)
+            session.commit()
+            return applied
+        finally:
+            session.close()
+
+    def begin_edits(self, pdf_path, output_path, incremental=False, optimize=OPTIMIZE_FAST):
+        """Open pdf_path for editing and return a session to stage operations on.
+
+        session.stage(operations, page_hits=None, match_rects=None) applies
+        operations to the open document right away and returns their match
+        counts, and may be called any number of times; session.commit()
+        writes output_path once, as apply_edits() would, and session.close()
+        releases the document.
+        """
+        raise NotImplementedError
+
+    def append_edits(self, pdf_path, operations, page_hits, match_rects=None):
+        """Edit the file at pdf_path in place by appending one incremental update.
+
+        Only the pages named in page_hits are parsed, so callers can apply a
+        large plan window by window with bounded memory.
+        """
+        raise NotImplementedError
+
+    def _locate(self, doc, operations):
+        """Build page_hits with one automaton pass over every page's text"""
+        locator = TargetLocator([op.target for op in operations])
+        pages = ((i, self.page_text(doc, i)) for i in range(self.page_count(doc)))
+        return hits_by_page(locator.match_table(pages), operations)
+
+    def get_pdf_info(self, pdf_path):
+        """Metadata read from the trailer, catalog and page tree, without extracting text.
+
+        text_available is decided by the first page that has font
+        resources and text-showing operators in its content stream.
+        """
+        raise NotImplementedError
+
+    def _locked_info(self):
+        """What get_pdf_info() reports for a file that cannot be opened without its user password"""
+        return {'pages': 'unknown', 'encrypted': True, 'text_available': False}
+
+
+class PyPDFBackend(PDFBackend):
+    """Pure-Python engine built on pypdf"""
+    name = 'pypdf'
+
+    def open(self, pdf_path):
+        # pypdf would read a path fully into a BytesIO; hand it an mmap instead
+        return PdfReader(open_stream(pdf_path))
+
+    def close(self, doc):
+        doc.close()
+        doc.stream.close()
+
+    def page_count(self, doc):
+        return len(doc.pages)
+
+    def page_text(self, doc, index):
+        return doc.pages[index].extract_text() or ""
+
+    def search(self, doc, index, text):
+        return self._find_rects(self._text_fragments(doc.pages[index]), text)
+
+    def page_words(self, doc, index):
+        words = []
+        for fragment in self._text_fragments(doc.pages[index]):
+            positions = self._fragment_positions(fragment)
+            for match in re.finditer(r'\S+', fragment[0]):
+                x0, y0, x1, y1 = self._fragment_box(fragment, positions, match.start(), match.end())
+                words.append((x0, y0, x1, y1, match.group()))
+        return words
+
+    def begin_edits(self, pdf_path, output_path, incremental=False, optimize=OPTIMIZE_FAST):
+        return _PyPDFEditSession(self, pdf_path, output_path, incremental, optimize)
+
+    def append_edits(self, pdf_path, operations, page_hits, match_rects=None):
+        reader = self.open(pdf_path)
+        try:
+            if reader.is_encrypted:
+                raise Exception("Encrypted documents cannot be updated incrementally")
+            update = IncrementalUpdate(reader)
+            applied = self._stage_edits(reader.pages, update, operations, page_hits, match_rects)
+            with open(pdf_path, 'ab') as output_file:
+                update.write(output_file)
+            return applied
+        finally:
+            self.close(reader)
+
+    def _stage_edits(self, pages, edits, operations, page_hits, match_rects):
+        """Apply every operation to the given pages, recording changes through edits"""
+        applied = [0] * len(operations)
+
+        if page_hits is None:
+            page_hits = self._locate_pages(pages, operations)
+
+        for page_number in sorted(page_hits):
+            hits = page_hits[page_number]
+            page = pages[page_number]
+
+            replacements = [i for i in hits if operations[i].kind == REPLACE]
+            highlights = [i for i in hits if operations[i].kind == HIGHLIGHT]
+
+            if highlights:
+                page_rects = (match_rects or {}).get(page_number, {})
+                fragments = None
+                for i in highlights:
+                    if i in page_rects:
+                        for rects in page_rects[i]:
+                            for rect in rects:
+                                edits.add_annotation(page, self._highlight_annotation(rect))
+                            applied[i] += 1
+                        continue
+                    if fragments is None:
+                        fragments = self._text_fragments(page)
+                    for rect in self._find_rects(fragments, operations[i].target):
+                        edits.add_annotation(page, self._highlight_annotation(rect))
+                        applied[i] += 1
+
+            if replacements:
+                content, counts = self._replace_in_content(page, [operations[i] for i in replacements])
+                if any(counts):
+                    edits.replace_contents(page, content)
+                for i, count in zip(replacements, counts):
+                    applied[i] += count
+
+        return applied
+
+    def _optimize(self, writer, edited_pages, preset):
+        """Shrink a writer's output in place according to an OPTIMIZE_PRESETS name"""
+        if preset == OPTIMIZE_NONE:
+            return
+        if preset == OPTIMIZE_SMALL:
+            for page in writer.pages:
+                page.compress_content_streams(level=9)
+            writer.compress_identical_objects(remove_duplicates=True, remove_unreferenced=True)
+            return
+        # Rewritten content streams are stored decoded until compressed again
+        for page in edited_pages:
+            page.compress_content_streams()
+        writer.compress_identical_objects(remove_duplicates=False, remove_unreferenced=True)
+
+    def _locate_pages(self, pages, operations):
+        locator = TargetLocator([op.target for op in operations])
+        texts = ((i, page.extract_text() or "") for i, page in enumerate(pages))
+        return hits_by_page(locator.match_table(texts), operations)
+
+    def get_pdf_info(self, pdf_path):
+        reader = self.open(pdf_path)
+        try:
+            encrypted = reader.is_encrypted
+            if encrypted and not reader.decrypt(''):
+                return self._locked_info()
+            # The typed accessors resolve indirect entries, which would not serialize
+            metadata = reader.metadata or DocumentInformation()
+            return {
+                'pages': len(reader.pages),
+                'title': metadata.title,
+                'author': metadata.author,
+                'producer': metadata.producer,
+                'encrypted': encrypted,
+                'page_sizes': [[float(page.mediabox.width), float(page.mediabox.height)] for page in reader.pages],
+                'outline': self._flatten_outline(reader, reader.outline),
+                'text_available': any(self._has_text(page) for page in reader.pages),
+            }
+        finally:
+            self.close(reader)
+
+    def _has_text(self, page):
+        resources = page.get('/Resources')
+        if not resources or '/Font' not in resources.get_object():
+            return False
+        contents = page.get_contents()
+        return contents is not None and TEXT_SHOW_PATTERN.search(contents.get_data()) is not None
+
+    def _flatten_outline(self, reader, outline, level=1):
+        """[level, title, page_number] rows in the same shape as PyMuPDF's get_toc()"""
+        rows = []
+        for item in outline:
+            if isinstance(item, list):
+                rows.extend(self._flatten_outline(reader, item, level + 1))
+            else:
+                page_number = reader.get_destination_page_number(item)
+                # PyMuPDF reports -1 for entries that point at no page
+                rows.append([level, str(item.title), page_number + 1 if page_number is not None else -1])
+        return rows
+
+    def _replace_in_content(self, page, operations):
+        """Rewrite text-showing operators on one page, parsing its content stream once.
+
+        Returns the edited content stream and the match count per operation.
+        Strings are decoded and re-encoded with the current font's encoding;
+        text in fonts whose encoding is unknown is left alone, and a
+        replacement the font cannot encode, or whose glyphs a subset font
+        may lack, is skipped and not counted.
+        Replacements wider than the text they replace, measured in the
+        current font, are narrowed with horizontal scaling so they do not
+        run into whatever follows them on the line.
+        """
+        content = ContentStream(page.get_contents(), page.indirect_reference.pdf)
+        counts = [0] * len(operations)
+        fonts = self._page_fonts(page)
+        fonts_by_name = {}
+        drawn_codes = self._codes_by_font(content)
+        font, encoding, font_size, scale = None, None, 0.0, 100.0
+        saved_states = []
+        edited = []
+
+        for operands, operator in content.operations:
+            original = text = None
+            if operator == b'q':
+                saved_states.append((font, encoding, font_size, scale))
+            elif operator == b'Q' and saved_states:
+                font, encoding, font_size, scale = saved_states.pop()
+            elif operator == b'Tf' and len(operands) == 2:
+                if operands[0] not in fonts_by_name:
+                    font_dict = fonts.get(operands[0])
+                    fonts_by_name[operands[0]] = (
+                        pypdf_font_metrics(font_dict),
+                        pypdf_font_encoding(font_dict, drawn_codes.get(operands[0], ()))
+                    )
+                (font, encoding), font_size = fonts_by_name[operands[0]], float(operands[1])
+            elif operator == b'Tz' and operands:
+                scale = float(operands[0])
+            elif operator in TEXT_SHOW_OPERATORS and operands and encoding:
+                index = len(operands) - 1
+                original = _decode_string(operands[index], encoding)
+                if original is not None:
+                    text = _replace_text(original, operations, counts, encoding)
+                    if text != original:
+                        operands[index] = ByteStringObject(encoding.encode(text))
+            elif operator == b'TJ' and operands and encoding:
+                # Kerned runs are joined so targets split across elements still match
+                strings = [_decode_string(item, encoding) for item in operands[0]]
+                original = "".join(string for string in strings if string is not None)
+                text = _replace_text(original, operations, counts, encoding)
+                if text != original:
+                    operands[0] = ArrayObject([ByteStringObject(encoding.encode(text))])
+
+            fit = 1.0
+            if font is not None and original is not None and original != text:
+                codes = encoding.encode(text)
+                fit = font.fit_scale(codes, font_size, font.measure(encoding.encode(original), font_size))
+            if fit < 1.0:
+                edited.append(([FloatObject(scale * max(fit, MIN_HORIZONTAL_SCALE))], b'Tz'))
+                edited.append((operands, operator))
+                edited.append(([FloatObject(scale)], b'Tz'))
+            else:
+                edited.append((operands, operator))
+
+        content.operations = edited
+        return content, counts
+
+    def _codes_by_font(self, content):
+        """Character codes shown in each font resource of a content stream"""
+        codes = {}
+        name = None
+        saved_names = []
+        for operands, operator in content.operations:
+            if operator == b'q':
+                saved_names.append(name)
+            elif operator == b'Q' and saved_names:
+                name = saved_names.pop()
+            elif operator == b'Tf' and len(operands) == 2:
+                name = operands[0]
+            elif operator in TEXT_SHOW_OPERATORS + (b'TJ',) and operands and name is not None:
+                strings = operands[0] if operator == b'TJ' else operands[-1:]
+                for string in strings:
+                    data = _string_bytes(string)
+                    if data is not None:
+                        codes.setdefault(name, set()).update(data)
+        return codes
+
+    def _page_fonts(self, page):
+        resources = page.get('/Resources')
+        fonts = resources.get_object().get('/Font') if resources is not None else None
+        return fonts.get_object() if fonts is not None else {}
+
+    def _text_fragments(self, page):
+        """Collect (text, x, y, font_size, metrics) for every text run on the page"""
+        fragments = []
+        metrics_by_font = {}
+
+        def visitor(text, cm, tm, font_dict, font_size):
+            if not text.strip():
+                return
+            x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+            y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+            size = font_size * (tm[3] or 1) * (cm[3] or 1)
+            if id(font_dict) not in metrics_by_font:
+                metrics_by_font[id(font_dict)] = pypdf_font_metrics(font_dict)
+            fragments.append((text, x, y, abs(size), metrics_by_font[id(font_dict)]))
+
+        page.extract_text(visitor_text=visitor)
+        return fragments
+
+    def _find_rects(self, fragments, target):
+        """Bounding boxes of target occurrences inside text fragments"""
+        rects = []
+        for fragment in fragments:
+            text = fragment[0]
+            start = text.find(target)
+            positions = None
+            while start != -1:
+                if positions is None:
+                    positions = self._fragment_positions(fragment)
+                rects.append(self._fragment_box(fragment, positions, start, start + len(target)))
+                start = text.find(target, start + len(target))
+        return rects
+
+    def _fragment_positions(self, fragment):
+        """x offset of every character of a text run, from its font's glyph widths when known"""
+        text, _, _, size, metrics = fragment
+        if metrics is None:
+            return [i * size * AVERAGE_CHAR_WIDTH for i in range(len(text) + 1)]
+        return metrics.advances(text, size)
+
+    def _fragment_box(self, fragment, positions, start, end):
+        """Box of characters start..end of a text run drawn at (x, y)"""
+        _, x, y, size, _ = fragment
+        return (x + float(positions[start]), y - size * 0.25, x + float(positions[end]), y + size)
+
+    def _highlight_annotation(self, rect):
+        """Build a yellow highlight annotation covering rect"""
+        x0, y0, x1, y1 = rect
+        quad_points = ArrayObject([FloatObject(v) for v in (x0, y1, x1, y1, x0, y0, x1, y0)])
+        return Highlight(rect=rect, quad_points=quad_points, highlight_color="ffff00")
+
+
+def _string_bytes(operand):
+    """Bytes of a string operand as stored in the content stream, or None for other operands"""
+    if isinstance(operand, TextStringObject):
+        return operand.get_original_bytes()
+    if isinstance(operand, ByteStringObject):
+        return bytes(operand)
+    return None
+
+
+def _decode_string(operand, encoding):
+    """Text of a string operand as its font reads the bytes, or None for non-string operands"""
+    data = _string_bytes(operand)
+    if data is None:
+        return None
+    return encoding.decode(data)
+
+
+def _replace_text(text, operations, counts, encoding):
+    """Apply every operation the font can encode to text, adding to counts"""
+    for i, op in enumerate(operations):
+        if op.target not in text or not encoding.can_encode(op.replacement):
+            continue
+        counts[i] += text.count(op.target)
+        text = text.replace(op.target, op.replacement)
+    return text
+
+
+class _WriterEdits:
+    """Records page edits on a PdfWriter, mirroring IncrementalUpdate's interface"""
+    def __init__(self, writer):
+        self.writer = writer
+        self.edited_pages = []
+
+    def add_annotation(self, page, annotation):
+        self.writer.add_annotation(page, annotation)
+
+    def replace_contents(self, page, content):
+        page.replace_contents(content)
+        # A page edited by several stage() calls is still compressed once
+        if not any(edited is page for edited in self.edited_pages):
+            self.edited_pages.append(page)
+
+
+class _PyPDFEditSession:
+    """pypdf document held open across stage() calls: a cloned writer, or an incremental update"""
+    def __init__(self, backend, pdf_path, output_path, incremental, optimize):
+        self.backend = backend
+        self.output_path = output_path
+        self.incremental = incremental
+        self.optimize = optimize
+        if incremental:
+            write_source(pdf_path, output_path)
+            self.reader = backend.open(output_path)
+            if self.reader.is_encrypted:
+                backend.close(self.reader)
+                raise Exception("Encrypted documents cannot be updated incrementally")
+            self.pages = self.reader.pages
+            self.edits = IncrementalUpdate(self.reader)
+        else:
+            self.reader = backend.open(pdf_path)
+            self.writer = PdfWriter(clone_from=self.reader)
+            self.pages = self.writer.pages
+            self.edits = _WriterEdits(self.writer)
+
+    def stage(self, operations, page_hits=None, match_rects=None):
+        return self.backend._stage_edits(self.pages, self.edits, operations, page_hits, match_rects)
+
+    def commit(self):
+        if self.incremental:
+            with open(self.output_path, 'ab') as output_file:
+                self.edits.write(output_file)
+            return
+        self.backend._optimize(self.writer, self.edits.edited_pages, self.optimize)
+        with open(self.output_path, 'wb') as output_file:
+            self.writer.write(output_file)
+
+    def close(self):
+        if self.reader is not None:
+            self.backend.close(self.reader)
+            self.reader = None
+
+
+class PyMuPDFBackend(PDFBackend):
+    """MuPDF engine: native text search, redaction-based replacement and highlight annotations"""
+    name = 'pymupdf'
+
+    def __init__(self):
+        if fitz is None:
+            raise Exception("PyMuPDF is not installed; install it or set PDF_BACKEND=pypdf")
+
+    def open(self, pdf_path):
+        # MuPDF reads files on demand; buffers must be handed over as bytes
+        if is_path(pdf_path):
+            return fitz.open(pdf_path)
+        return fitz.open(stream=as_bytes(pdf_path), filetype='pdf')
+
+    def close(self, doc):
+        doc.close()
+
+    def page_count(self, doc):
+        return doc.page_count
+
+    def page_text(self, doc, index):
+        return doc[index].get_text()
+
+    def search(self, doc, index, text):
+        return [tuple(quad.rect) for quad in self._search_exact(doc[index], text)]
+
+    def _search_exact(self, page, text):
+        """Quads of text on page, matching case exactly; search_for() alone ignores case.
+
+        Each hit is read back along the middle of its line, since the full
+        rect of a tightly set line overlaps the lines above and below.
+        """
+        quads = []
+        for quad in page.search_for(text, quads=True):
+            rect = quad.rect
+            middle = (rect.y0 + rect.y1) / 2
+            if page.get_textbox(fitz.Rect(rect.x0, middle, rect.x1, middle)) == text:
+                quads.append(quad)
+        return quads
+
+    def page_words(self, doc, index):
+        return [word[:5] for word in doc[index].get_text("words")]
+
+    def begin_edits(self, pdf_path, output_path, incremental=False, optimize=OPTIMIZE_FAST):
+        return _PyMuPDFEditSession(self, pdf_path, output_path, incremental, optimize)
+
+    def append_edits(self, pdf_path, operations, page_hits, match_rects=None):
+        doc = fitz.open(pdf_path)
+        try:
+            if not doc.can_save_incrementally():
+                raise Exception("Document cannot be updated incrementally")
+            applied = self._stage_edits(doc, operations, page_hits, match_rects)
+            doc.saveIncr()
+            return applied
+        finally:
+            doc.close()
+
+    def _stage_edits(self, doc, operations, page_hits, match_rects):
+        """Apply every operation to the document's pages in memory"""
+        applied = [0] * len(operations)
+
+        if page_hits is None:
+            page_hits = self._locate(doc, operations)
+
+        for page_number in sorted(page_hits):
+            hits = page_hits[page_number]
+            page = doc[page_number]
+            page_rects = (match_rects or {}).get(page_number, {})
+            replacements = []
+            spans = None
+            for i in hits:
+                op = operations[i]
+                if op.kind == HIGHLIGHT and i in page_rects:
+                    for rects in page_rects[i]:
+                        page.add_highlight_annot(rects)
+                    applied[i] += len(page_rects[i])
+                elif op.kind == HIGHLIGHT:
+                    quads = self._search_exact(page, op.target)
+                    if quads:
+                        page.add_highlight_annot(quads)
+                        applied[i] += len(quads)
+                elif op.kind == REPLACE:
+                    rects = [quad.rect for quad in self._search_exact(page, op.target)]
+                    if rects and spans is None:
+                        spans = self._spans(page)
+                    for rect in rects:
+                        page.add_redact_annot(rect, fill=(1, 1, 1))
+                        size, baseline = self._span_at(spans, rect)
+                        replacements.append((
+                            fitz.Point(rect.x0, baseline),
+                            op.replacement,
+                            self._fitted_size(op.replacement, size, rect)
+                        ))
+                    applied[i] += len(rects)
+
+            if replacements:
+                page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE)
+                # Redaction text would be laid out by insert_textbox(), which needs about
+                # 1.7 times the font size in height and so shrinks text to fit the found rect
+                # One Shape adds a single content stream per page rather than one per insert_text()
+                shape = page.new_shape()
+                for point, text, size in replacements:
+                    shape.insert_text(point, text, fontname="helv", fontsize=size)
+                shape.commit()
+
+        return applied
+
+    def get_pdf_info(self, pdf_path):
+        doc = self.open(pdf_path)
+        try:
+            # is_encrypted is False once MuPDF has opened the file with the empty user password
+            if doc.needs_pass and not doc.authenticate(''):
+                return self._locked_info()
+            metadata = doc.metadata or {}
+            encrypted = doc.needs_pass or bool(metadata.get('encryption'))
+            page_sizes = []
+            text_available = False
+            for page in doc:
+                page_sizes.append([page.rect.width, page.rect.height])
+                if not text_available and doc.get_page_fonts(page.number):
+                    text_available = TEXT_SHOW_PATTERN.search(page.read_contents()) is not None
+            return {
+                'pages': doc.page_count,
+                'title': metadata.get('title') or None,
+                'author': metadata.get('author') or None,
+                'producer': metadata.get('producer') or None,
+                'encrypted': encrypted,
+                'page_sizes': page_sizes,
+                'outline': doc.get_toc(simple=True),
+                'text_available': text_available,
+            }
+        finally:
+            doc.close()
+
+    def _spans(self, page):
+        """(bbox, size, baseline) of every text span on the page, read once per page"""
+        return [
+            (fitz.Rect(span["bbox"]), span["size"], span["origin"][1])
+            for block in page.get_text("dict")["blocks"]
+            for line in block.get("lines", [])
+            for span in line["spans"]
+        ]
+
+    def _span_at(self, spans, rect):
+        """Size and baseline of the text span at the middle of rect, so replacements sit where the old text was"""
+        middle = fitz.Point(rect.x0 + rect.width / 2, rect.y0 + rect.height / 2)
+        for bbox, size, baseline in spans:
+            if middle in bbox:
+                return size, baseline
+        return 11, rect.y1 - rect.height * 0.2
+
+    def _fitted_size(self, text, size, rect):
+        """Original size, or smaller if text would be wider than rect.
+
+        The replacement is measured in Helvetica, the font it is drawn in.
+        """
+        width = standard_font_metrics('Helvetica').measure(text, 1.0)
+        if not width:
+            return size
+        return max(min(size, rect.width / width), MIN_REPLACEMENT_FONT_SIZE)
+
+
+class _PyMuPDFEditSession:
+    """MuPDF document held open across stage() calls"""
+    def __init__(self, backend, pdf_path, output_path, incremental, optimize):
+        self.backend = backend
+        self.output_path = output_path
+        self.optimize = optimize
+        self.doc = backend.open(pdf_path)
+        if incremental and self.doc.can_save_incrementally():
+            # MuPDF only appends to the file it opened, so edit a byte copy of the source
+            self.doc.close()
+            write_source(pdf_path, output_path)
+            self.doc = fitz.open(output_path)
+        else:
+            incremental = False
+        self.incremental = incremental
+
+    def stage(self, operations, page_hits=None, match_rects=None):
+        return self.backend._stage_edits(self.doc, operations, page_hits, match_rects)
+
+    def commit(self):
+        if self.incremental:
+            self.doc.saveIncr()
+        else:
+            if self.optimize == OPTIMIZE_SMALL and fontTools is not None:
+                self.doc.subset_fonts()
+            self.doc.save(self.output_path, **PYMUPDF_SAVE_OPTIONS[self.optimize])
+
+    def close(self):
+        if self.doc is not None:
+            self.doc.close()
+            self.doc = None
+
+
+BACKENDS = {
+    PyPDFBackend.name: PyPDFBackend,
+    PyMuPDFBackend.name: PyMuPDFBackend,
+}
+
+
+def get_backend(name):
+    """Instantiate a backend by its registry name"""
+    try:
+        return BACKENDS[name.lower()]()
+    except KeyError:
+        raise Exception(f"Unknown PDF backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
@@ -1,60 +1,330 @@
 
-import os
-import shutil
-from pypdf import PdfReader, PdfWriter
-import io
+import json
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from config import Config
+from utils.cmap_cache import get_cmap_cache
+from utils.document_source import is_path, write_source
+from utils.font_metrics import get_font_metrics_cache
+from utils.instructions import EditOperation, REPLACE, HIGHLIGHT
+from utils.locator import TargetLocator, hits_by_page
+from utils.pdf_backends import OPTIMIZE_PRESETS, get_backend
+from utils.positional_index import PositionalIndex, get_index_store
+from utils.retrieval import BM25Index, chunk_pages, format_context, get_retrieval_store
+from utils.text_cache import file_sha256, get_page_cache
+from utils.token_budget import get_token_counter
+
+
+class PDFProcessor:
+    def __init__(self, backend=None, cache=None):
+        self.config = Config()
+        self.backend = get_backend(backend or self.config.PDF_BACKEND)
+        self.cache = cache if cache is not None else get_page_cache()
+        self.index_store = get_index_store()
+        self.retrieval_store = get_retrieval_store()
 
-class PDFProcessorStable:
-    def __init__(self):
-        pass
-        
     def extract_full_text(self, pdf_path):
-        """Extract text from PDF using PyPDF"""
+        """Extract text from PDF using the configured backend"""
         try:
-            with open(pdf_path, 'rb') as file:
-                reader = PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\\n\\n"
-                return text if text else "No text could be extracted from the PDF"
+            text = "\n\n".join(page_text for _, page_text in self.iter_pages(pdf_path) if page_text)
+            return text if text else "No text could be extracted from the PDF"
         except Exception as e:
             return f"Error extracting text: {str(e)}"
-    
+
+    def page_count(self, pdf_path, file_hash=None):
+        """Number of pages, served from the cache for known files"""
+        file_hash = file_hash or file_sha256(pdf_path)
+        count = self.cache.get(self.backend.name, file_hash, 'count')
+        if count is None:
+            doc = self.backend.open(pdf_path)
+            try:
+                count = self.backend.page_count(doc)
+            finally:
+                self.backend.close(doc)
+            self.cache.put(self.backend.name, file_hash, 'count', str(count))
+        return int(count)
+
+    def cache_stats(self):
+        """Hit/miss counters of the shared page text cache"""
+        return self.cache.stats()
+
+    def stats(self):
+        """Counters of every shared cache the processor reads through"""
+        return {
+            'page_text': self.cache.stats(),
+            'font_metrics': get_font_metrics_cache().stats(),
+            'cmaps': get_cmap_cache().stats(),
+        }
+
+    def iter_pages(self, pdf_path, start=0, stop=None, file_hash=None):
+        """Lazily yield (page_number, text) for pages start..stop, zero-based.
+
+        Pages are extracted one at a time and only when missing from the
+        cache, so callers that stop early never pay for the rest of the file.
+        """
+        file_hash = file_hash or file_sha256(pdf_path)
+        namespace = self.backend.name
+        count = self.page_count(pdf_path, file_hash)
+        stop = count if stop is None else min(stop, count)
+        if self._use_parallel(pdf_path, stop - start):
+            yield from self._iter_pages_parallel(pdf_path, file_hash, start, stop)
+            return
+
+        doc = None
+        try:
+            for index in range(start, stop):
+                text = self.cache.get(namespace, file_hash, index)
+                if text is None:
+                    if doc is None:
+                        doc = self.backend.open(pdf_path)
+                    text = self.backend.page_text(doc, index)
+                    self.cache.put(namespace, file_hash, index, text)
+                yield index, text
+        finally:
+            if doc is not None:
+                self.backend.close(doc)
+
+    def _use_parallel(self, pdf_path, pages):
+        """Parallel extraction only pays off for files spanning several shards"""
+        # Workers reopen the file themselves; in-memory buffers would be pickled to each one
+        return (
+            is_path(pdf_path)
+            and self.config.PARALLEL_EXTRACTION
+            and self.config.EXTRACT_WORKERS > 1
+            and pages >= 2 * self.config.EXTRACT_MIN_SHARD_PAGES
+        )
+
+    def _iter_pages_parallel(self, pdf_path, file_hash, start, stop):
+        """Extract uncached pages in shards across worker processes, yielding in page order"""
+        namespace = self.backend.name
+        cached = {}
+        missing = []
+        for index in range(start, stop):
+            text = self.cache.get(namespace, file_hash, index)
+            if text is None:
+                missing.append(index)
+            else:
+                cached[index] = text
+
+        workers = self.config.EXTRACT_WORKERS
+        shard_size = max(self.config.EXTRACT_MIN_SHARD_PAGES, math.ceil(len(missing) / workers))
+        shards = [missing[i:i + shard_size] for i in range(0, len(missing), shard_size)]
+
+        # Workers are spawned, not forked: a fork from Streamlit's threads would inherit held locks
+        pool = ProcessPoolExecutor(
+            max_workers=min(workers, len(shards)),
+            mp_context=multiprocessing.get_context('spawn')
+        ) if shards else None
+        try:
+            # map() returns shards in submission order, and shards are in page order
+            results = pool.map(_extract_pages, repeat(namespace), repeat(pdf_path), shards) if pool else iter(())
+            extracted = {}
+            for index in range(start, stop):
+                if index in cached:
+                    yield index, cached.pop(index)
+                    continue
+                while index not in extracted:
+                    for page_index, text in next(results):
+                        self.cache.put(namespace, file_hash, page_index, text)
+                        extracted[page_index] = text
+                yield index, extracted.pop(index)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def search_text(self, pdf_path, text, max_results=None):
+        """Find occurrences of text, returning (page_number, rect) pairs.
+
+        Only pages whose extracted text contains the target are searched
+        for coordinates, and the scan stops once max_results are found.
+        """
+        results = []
+        doc = None
+        try:
+            for index, page_text in self.iter_pages(pdf_path):
+                if text not in page_text:
+                    continue
+                if doc is None:
+                    doc = self.backend.open(pdf_path)
+                results.extend((index, rect) for rect in self.backend.search(doc, index, text))
+                if max_results is not None and len(results) >= max_results:
+                    return results[:max_results]
+            return results
+        finally:
+            if doc is not None:
+                self.backend.close(doc)
+
+    def positional_index(self, pdf_path, file_hash=None):
+        """Word-level positional index, built once per file hash and persisted"""
+        file_hash = file_hash or file_sha256(pdf_path)
+        index = self.index_store.get(self.backend.name, file_hash)
+        if index is None:
+            doc = self.backend.open(pdf_path)
+            try:
+                index = PositionalIndex.build(
+                    (text, self.backend.page_words(doc, page_number))
+                    for page_number, text in self.iter_pages(pdf_path, file_hash=file_hash)
+                )
+            finally:
+                self.backend.close(doc)
+            self.index_store.put(self.backend.name, file_hash, index)
+        return index
+
+    def retrieve_context(self, pdf_path, query, top_k=None, token_budget=None, file_hash=None):
+        """Page/paragraph chunks most relevant to query, formatted as prompt context.
+
+        The BM25 index is built once per file hash from the cached page
+        texts; everything runs locally.
+        """
+        file_hash = file_hash or file_sha256(pdf_path)
+        index = self.retrieval_store.get(
+            self.backend.name, file_hash,
+            lambda: BM25Index(chunk_pages(self.iter_pages(pdf_path, file_hash=file_hash),
+                                          self.config.RETRIEVAL_CHUNK_WORDS))
+        )
+        chunks = index.select(
+            query,
+            top_k or self.config.RETRIEVAL_TOP_K,
+            token_budget or self.config.RETRIEVAL_TOKEN_BUDGET,
+            get_token_counter().count
+        )
+        return format_context(chunks)
+
+    def locate(self, pdf_path, operations, file_hash=None):
+        """Find every operation target in one pass over the cached page texts.
+
+        Returns a match table of (target, page, offset) entries.
+        """
+        locator = TargetLocator([op.target for op in operations])
+        return locator.match_table(self.iter_pages(pdf_path, file_hash=file_hash))
+
+    def apply_edits(self, pdf_path, output_path, operations, matches=None, optimize=None, file_hash=None):
+        """Apply a batch of REPLACE/HIGHLIGHT operations with one read and one write.
+
+        matches is a table from locate(); it is computed when not given.
+        optimize overrides the OUTPUT_OPTIMIZATION preset for this call.
+        Returns a list with the number of matches applied for each operation.
+        """
+        optimize = optimize or self.config.OUTPUT_OPTIMIZATION
+        if optimize not in OPTIMIZE_PRESETS:
+            raise Exception(f"Unknown optimization preset '{optimize}'. Choose one of: {', '.join(OPTIMIZE_PRESETS)}")
+        file_hash = file_hash or file_sha256(pdf_path)
+        if matches is None:
+            matches = self.locate(pdf_path, operations, file_hash)
+        page_hits = hits_by_page(matches, operations)
+        match_rects = self.highlight_rects(pdf_path, matches, operations, file_hash)
+
+        if self.config.WINDOWED_EDITS:
+            return self._apply_edits_windowed(pdf_path, output_path, operations, page_hits, match_rects)
+        return self.backend.apply_edits(
+            pdf_path, output_path, operations,
+            incremental=self.config.INCREMENTAL_SAVE,
+            page_hits=page_hits,
+            match_rects=match_rects,
+            optimize=optimize
+        )
+
+    def begin_edits(self, pdf_path, output_path, optimize=None):
+        """Open pdf_path once for a series of staged edits ending in a single write.
+
+        Returns the backend's edit session; see EditPipeline. Sessions hold
+        the whole document, so WINDOWED_EDITS does not apply to them.
+        """
+        optimize = optimize or self.config.OUTPUT_OPTIMIZATION
+        if optimize not in OPTIMIZE_PRESETS:
+            raise Exception(f"Unknown optimization preset '{optimize}'. Choose one of: {', '.join(OPTIMIZE_PRESETS)}")
+        return self.backend.begin_edits(
+            pdf_path, output_path,
+            incremental=self.config.INCREMENTAL_SAVE,
+            optimize=optimize
+        )
+
+    def _apply_edits_windowed(self, pdf_path, output_path, operations, page_hits, match_rects):
+        """Copy the source once, then append one incremental update per window of pages.
+
+        Each window is parsed, edited and flushed to the output before the
+        next one is opened, so at most EDIT_WINDOW_PAGES pages of parsed
+        objects are alive at any time regardless of the document size.
+        """
+        window_size = self.config.EDIT_WINDOW_PAGES
+        windows = {}
+        for page_number, hits in page_hits.items():
+            windows.setdefault(page_number // window_size, {})[page_number] = hits
+
+        write_source(pdf_path, output_path)
+        applied = [0] * len(operations)
+        for window in sorted(windows):
+            counts = self.backend.append_edits(output_path, operations, windows[window], match_rects)
+            applied = [total + count for total, count in zip(applied, counts)]
+        return applied
+
+    def highlight_rects(self, pdf_path, matches, operations, file_hash=None):
+        """Slice highlight rectangles for every highlight match out of the positional index"""
+        highlights = {}
+        for i, op in enumerate(operations):
+            if op.kind == HIGHLIGHT:
+                highlights.setdefault(op.target, []).append(i)
+        matches = [match for match in matches if match.target in highlights]
+        if not matches:
+            return None
+
+        index = self.positional_index(pdf_path, file_hash)
+        match_rects = {}
+        for match in matches:
+            rects = index.rects_for_span(match.page, match.offset, match.offset + len(match.target))
+            if not rects:
+                continue
+            page_rects = match_rects.setdefault(match.page, {})
+            for i in highlights[match.target]:
+                page_rects.setdefault(i, []).append(rects)
+        return match_rects
+
     def replace_text(self, pdf_path, output_path, old_text, new_text):
-        """Basic PDF modification - creates a new PDF with annotation"""
+        """Replace every occurrence of old_text with new_text"""
         try:
-            reader = PdfReader(pdf_path)
-            writer = PdfWriter()
-            
-            for page in reader.pages:
-                writer.add_page(page)
-            
-            # Add a watermark or annotation instead of text replacement
-            with open(output_path, 'wb') as output_file:
-                writer.write(output_file)
-            
+            self.apply_edits(pdf_path, output_path, [EditOperation(REPLACE, old_text, new_text)])
             return True
         except Exception as e:
             # Fallback to simple copy
-            shutil.copy2(pdf_path, output_path)
+            write_source(pdf_path, output_path)
             return True
-    
+
     def highlight_text(self, pdf_path, output_path, text_to_highlight):
-        """Basic highlighting simulation"""
-        shutil.copy2(pdf_path, output_path)
+        """Add highlight annotations over every occurrence of the text"""
+        try:
+            self.apply_edits(pdf_path, output_path, [EditOperation(HIGHLIGHT, text_to_highlight, None)])
+        except Exception as e:
+            write_source(pdf_path, output_path)
         return True
-    
-    def get_pdf_info(self, pdf_path):
-        """Get basic PDF information"""
+
+    def get_pdf_info(self, pdf_path, file_hash=None):
+        """Get basic PDF information, cached per file hash"""
         try:
-            with open(pdf_path, 'rb') as file:
-                reader = PdfReader(file)
-                return {
-                    'pages': len(reader.pages),
-                    'text_available': any(page.extract_text() for page in reader.pages)
-                }
+            file_hash = file_hash or file_sha256(pdf_path)
+            cached = self.cache.get(self.backend.name, file_hash, 'info')
+            if cached is not None:
+                return json.loads(cached)
+            info = self.backend.get_pdf_info(pdf_path)
+            self.cache.put(self.backend.name, file_hash, 'info', json.dumps(info))
+            return info
         except:
             return {'pages': 'unknown', 'text_available': False}
-EOL
\ No newline at end of file
+
+
+def _extract_pages(backend_name, pdf_path, indices):
+    """Worker entry point: open the file independently and extract a shard of pages"""
+    backend = get_backend(backend_name)
+    doc = backend.open(pdf_path)
+    try:
+        return [(index, backend.page_text(doc, index)) for index in indices]
+    finally:
+        backend.close(doc)
+
+
+class PDFProcessorStable(PDFProcessor):
+    """Processor pinned to the pure-Python pypdf backend"""
+    def __init__(self):
+        super().__init__(backend='pypdf')
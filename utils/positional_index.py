@@ -0,0 +1,153 @@
+import os
+import threading
+
+import numpy as np
+
+from config import Config
+from utils.lru import LRUCache, process_singleton
+
+# Words whose vertical centres differ by less than this fraction of their height share a line
+LINE_TOLERANCE = 0.5
+
+
+class PositionalIndex:
+    """Word positions of a whole document stored as flat NumPy arrays.
+
+    Words of page p occupy rows page_starts[p]:page_starts[p + 1]. For each
+    word, offsets/lengths locate it in the page's extracted text (offset -1
+    when it could not be aligned) and boxes holds (x0, y0, x1, y1) in the
+    backend's page coordinate space.
+    """
+    def __init__(self, page_starts, offsets, lengths, boxes):
+        self.page_starts = page_starts
+        self.offsets = offsets
+        self.lengths = lengths
+        self.boxes = boxes
+
+    @classmethod
+    def build(cls, pages):
+        """Build from (page_text, [(x0, y0, x1, y1, word), ...]) pairs, one per page.
+
+        Each page is turned into arrays as soon as it is read, so only one
+        page's words are ever held as Python objects.
+        """
+        page_starts = [0]
+        offsets = []
+        lengths = []
+        boxes = []
+        for page_text, words in pages:
+            page_offsets = np.empty(len(words), dtype=np.int32)
+            page_lengths = np.empty(len(words), dtype=np.int32)
+            page_boxes = np.empty((len(words), 4), dtype=np.float32)
+            cursor = 0
+            for row, (x0, y0, x1, y1, word) in enumerate(words):
+                offset = page_text.find(word, cursor)
+                if offset != -1:
+                    cursor = offset + len(word)
+                page_offsets[row] = offset
+                page_lengths[row] = len(word)
+                page_boxes[row] = (x0, y0, x1, y1)
+            offsets.append(page_offsets)
+            lengths.append(page_lengths)
+            boxes.append(page_boxes)
+            page_starts.append(page_starts[-1] + len(words))
+
+        return cls(
+            np.asarray(page_starts, dtype=np.int64),
+            np.concatenate(offsets) if offsets else np.empty(0, dtype=np.int32),
+            np.concatenate(lengths) if lengths else np.empty(0, dtype=np.int32),
+            np.concatenate(boxes) if boxes else np.empty((0, 4), dtype=np.float32),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['page_starts'], data['offsets'], data['lengths'], data['boxes'])
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(temp_path, page_starts=self.page_starts, offsets=self.offsets,
+                 lengths=self.lengths, boxes=self.boxes)
+        os.replace(temp_path, path)
+
+    @property
+    def page_count(self):
+        return len(self.page_starts) - 1
+
+    def rects_for_span(self, page, start, end):
+        """Line rectangles covering characters start..end of a page's extracted text.
+
+        Words cut by the span are trimmed proportionally, and consecutive
+        words on the same line are merged into one rectangle.
+        """
+        lo, hi = self.page_starts[page], self.page_starts[page + 1]
+        offsets = self.offsets[lo:hi]
+        lengths = self.lengths[lo:hi]
+        selected = (offsets >= 0) & (offsets < end) & (offsets + lengths > start)
+        if not selected.any():
+            return []
+
+        offsets = offsets[selected]
+        lengths = np.maximum(lengths[selected], 1)
+        boxes = self.boxes[lo:hi][selected].copy()
+
+        widths = boxes[:, 2] - boxes[:, 0]
+        head = np.clip((start - offsets) / lengths, 0, 1)
+        tail = np.clip((end - offsets) / lengths, 0, 1)
+        boxes[:, 2] = boxes[:, 0] + widths * tail
+        boxes[:, 0] = boxes[:, 0] + widths * head
+
+        centres = (boxes[:, 1] + boxes[:, 3]) / 2
+        heights = np.abs(boxes[:, 3] - boxes[:, 1])
+        new_line = np.ones(len(boxes), dtype=bool)
+        new_line[1:] = np.abs(np.diff(centres)) > heights[1:] * LINE_TOLERANCE
+        line_ids = np.cumsum(new_line) - 1
+
+        rects = []
+        for line in range(line_ids[-1] + 1):
+            line_boxes = boxes[line_ids == line]
+            rects.append((
+                float(line_boxes[:, 0].min()),
+                float(line_boxes[:, 1].min()),
+                float(line_boxes[:, 2].max()),
+                float(line_boxes[:, 3].max()),
+            ))
+        return rects
+
+
+class PositionalIndexStore:
+    """Indexes keyed by (backend, file hash): a few in memory, all of them on disk"""
+    def __init__(self, cache_dir, max_documents):
+        self.cache_dir = cache_dir
+        self.max_documents = max_documents
+        self._memory = LRUCache(max_documents)
+
+    def get(self, namespace, file_hash):
+        key = (namespace, file_hash)
+        index = self._memory.get(key)
+        if index is not None:
+            return index
+        try:
+            index = PositionalIndex.load(self._path(namespace, file_hash))
+        except (OSError, KeyError, ValueError):
+            return None
+        self._memory.put(key, index)
+        return index
+
+    def put(self, namespace, file_hash, index):
+        self._memory.put((namespace, file_hash), index)
+        try:
+            index.save(self._path(namespace, file_hash))
+        except OSError:
+            pass
+
+    def _path(self, namespace, file_hash):
+        return os.path.join(self.cache_dir, namespace, file_hash[:2], f"{file_hash}.npz")
+
+
+@process_singleton
+def get_index_store():
+    """Process-wide index store living next to the page text cache"""
+    config = Config()
+    return PositionalIndexStore(os.path.join(config.CACHE_FOLDER, 'index'), config.POSITIONAL_INDEX_CACHE_SIZE)
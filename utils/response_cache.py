@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import Config
+from utils.lru import LRUCache, process_singleton
+
+# Expired rows are only deleted when read, so put() also sweeps the table this often
+PURGE_INTERVAL_SECONDS = 3600
+
+
+class ResponseCache:
+    """LLM responses keyed by request hash: an in-memory LRU in front of a SQLite table.
+
+    Entries older than ttl_seconds are treated as misses and deleted on
+    sight, in both tiers, and expired rows nobody asks for again are swept
+    out periodically. The SQLite tier is best-effort: if it fails, lookups
+    miss and the memory tier carries on.
+    """
+    def __init__(self, db_path, max_entries, ttl_seconds):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = LRUCache(max_entries)
+        # Serialises the shared SQLite connection and the counters
+        self._lock = threading.Lock()
+        self._db = None
+        self._last_purge = 0.0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(provider, endpoint, model, parameters, prompt):
+        """SHA-256 of everything that determines a response, down to the server that gave it"""
+        digest = hashlib.sha256(json.dumps([provider, endpoint, model, parameters], sort_keys=True).encode('utf-8'))
+        # The prompt is hashed raw; JSON-escaping a whole document costs more than the hash
+        digest.update(b'\0')
+        digest.update(prompt.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached response text, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] <= self.ttl_seconds:
+                self.memory_hits += 1
+                return entry[0]
+            self._memory.pop(key)
+
+            try:
+                row = self._connection().execute(
+                    "SELECT response, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] > self.ttl_seconds:
+                    self._connection().execute("DELETE FROM responses WHERE key = ?", (key,))
+                    row = None
+            except (sqlite3.Error, OSError):
+                # The disk tier is best-effort; a broken database is a miss, not a failed request
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._memory.put(key, row)
+            return row[0]
+
+    def put(self, key, response):
+        """Store a response in both tiers, purging expired rows at most once per PURGE_INTERVAL_SECONDS"""
+        entry = (response, time.time())
+        with self._lock:
+            self._memory.put(key, entry)
+            try:
+                self._connection().execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)",
+                    (key, *entry)
+                )
+                if entry[1] - self._last_purge >= PURGE_INTERVAL_SECONDS:
+                    self._last_purge = entry[1]
+                    self._connection().execute(
+                        "DELETE FROM responses WHERE created < ?", (entry[1] - self.ttl_seconds,)
+                    )
+            except (sqlite3.Error, OSError):
+                # The memory tier still holds the entry
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_entries': len(self._memory),
+            }
+
+    def _connection(self):
+        """Shared connection, opened on first use; every access happens under the lock"""
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+            )
+        return self._db
+
+
+@process_singleton
+def get_response_cache():
+    """Process-wide response cache stored next to the page text cache"""
+    config = Config()
+    return ResponseCache(
+        os.path.join(config.CACHE_FOLDER, 'llm_responses.sqlite3'),
+        config.LLM_CACHE_SIZE,
+        config.LLM_CACHE_TTL_SECONDS
+    )
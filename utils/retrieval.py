@@ -0,0 +1,122 @@
+import math
+import re
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from config import Config
+from utils.lru import LRUCache, process_singleton
+
+Chunk = namedtuple('Chunk', ['page', 'text'])
+
+TERM_PATTERN = re.compile(r'\w+')
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+# Standard Okapi BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text):
+    return TERM_PATTERN.findall(text.lower())
+
+
+def chunk_pages(pages, max_words):
+    """Split (page_number, text) pairs into paragraph chunks of at most max_words words.
+
+    Extracted PDF text often has no blank lines at all, so paragraphs that
+    are still too long are cut on line boundaries.
+    """
+    chunks = []
+    for page, text in pages:
+        for paragraph in PARAGRAPH_BREAK.split(text):
+            lines = []
+            words = 0
+            for line in paragraph.splitlines():
+                line_words = len(line.split())
+                if lines and words + line_words > max_words:
+                    chunks.append(Chunk(page, "\n".join(lines)))
+                    lines, words = [], 0
+                if line.strip():
+                    lines.append(line)
+                    words += line_words
+            if lines:
+                chunks.append(Chunk(page, "\n".join(lines)))
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over document chunks, with postings held as NumPy arrays per term"""
+    def __init__(self, chunks):
+        self.chunks = chunks
+        documents = [Counter(tokenize(chunk.text)) for chunk in chunks]
+        self.lengths = np.asarray([sum(terms.values()) for terms in documents], dtype=np.float32)
+        self.average_length = float(self.lengths.mean()) if len(chunks) else 0.0
+
+        postings = {}
+        for chunk_id, terms in enumerate(documents):
+            for term, count in terms.items():
+                postings.setdefault(term, []).append((chunk_id, count))
+        self.postings = {
+            term: (np.asarray([c for c, _ in rows], dtype=np.int32), np.asarray([n for _, n in rows], dtype=np.float32))
+            for term, rows in postings.items()
+        }
+
+    def scores(self, query):
+        """BM25 score of every chunk for the query"""
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        if not self.chunks:
+            return scores
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths / max(self.average_length, 1e-6))
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            chunk_ids, counts = self.postings[term]
+            idf = math.log(1 + (len(self.chunks) - len(chunk_ids) + 0.5) / (len(chunk_ids) + 0.5))
+            scores[chunk_ids] += idf * counts * (BM25_K1 + 1) / (counts + norm[chunk_ids])
+        return scores
+
+    def select(self, query, top_k, token_budget, count_tokens):
+        """Best chunks for the query that fit the budget, returned in document order.
+
+        When nothing matches (prompts like "make it more formal"), the
+        opening chunks of the document are used instead.
+        """
+        scores = self.scores(query)
+        if scores.any():
+            ranked = [int(i) for i in np.argsort(-scores, kind='stable') if scores[i] > 0]
+        else:
+            ranked = list(range(len(self.chunks)))
+
+        selected = []
+        used = 0
+        for chunk_id in ranked:
+            if len(selected) >= top_k:
+                break
+            cost = count_tokens(self.chunks[chunk_id].text)
+            if used + cost > token_budget:
+                continue
+            selected.append(chunk_id)
+            used += cost
+        return [self.chunks[i] for i in sorted(selected)]
+
+
+def format_context(chunks):
+    """Join chunks with 1-based page markers so the model can tell where text came from"""
+    return "\n\n".join(f"[Page {chunk.page + 1}]\n{chunk.text}" for chunk in chunks)
+
+
+class RetrievalIndexStore:
+    """BM25 indexes keyed by (backend, file hash), kept for the most recent uploads"""
+    def __init__(self, max_documents):
+        self.max_documents = max_documents
+        self._indexes = LRUCache(max_documents)
+
+    def get(self, namespace, file_hash, build):
+        return self._indexes.get_or_build((namespace, file_hash), build)
+
+
+@process_singleton
+def get_retrieval_store():
+    """Process-wide BM25 index store"""
+    return RetrievalIndexStore(Config().RETRIEVAL_INDEX_CACHE_SIZE)
@@ -0,0 +1,66 @@
+import random
+import time
+
+from config import Config
+
+# Spread of the random extra wait added to server-provided delays
+SERVER_DELAY_JITTER = 0.1
+
+
+class RetryableError(Exception):
+    """A failure worth retrying; retry_after is a server-suggested wait in seconds, if any"""
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter, an attempt limit and an overall deadline.
+
+    Without a server hint, attempt n waits a random time up to
+    min(max_delay, base_delay * 2 ** n). A hint such as the Inference API's
+    estimated_time is used instead, plus a little jitter. No wait ever
+    runs past the deadline: if the next one would, the last error is
+    raised right away.
+    """
+    def __init__(self, max_attempts, base_delay, max_delay, deadline):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    @classmethod
+    def from_config(cls):
+        config = Config()
+        return cls(
+            config.LLM_MAX_ATTEMPTS,
+            config.LLM_RETRY_BASE_DELAY,
+            config.LLM_RETRY_MAX_DELAY,
+            config.LLM_DEADLINE
+        )
+
+    def run(self, operation):
+        """Call operation(remaining_seconds) until it succeeds or the policy gives up.
+
+        Only RetryableError is retried; anything else propagates at once.
+        """
+        started = time.monotonic()
+        for attempt in range(self.max_attempts):
+            remaining = self.deadline - (time.monotonic() - started)
+            try:
+                return operation(remaining)
+            except RetryableError as e:
+                error = e
+
+            delay = self.delay(attempt, error.retry_after)
+            remaining = self.deadline - (time.monotonic() - started)
+            if attempt + 1 >= self.max_attempts or delay >= remaining:
+                break
+            time.sleep(delay)
+
+        raise Exception(f"Gave up after {attempt + 1} attempt(s) in {time.monotonic() - started:.1f}s: {error}")
+
+    def delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return retry_after * (1 + random.uniform(0, SERVER_DELAY_JITTER))
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import threading
+
+from config import Config
+from utils.document_source import is_path
+from utils.lru import LRUCache, process_singleton
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(pdf_path):
+    """SHA-256 hex digest of a file read in chunks, or of an in-memory buffer"""
+    if not is_path(pdf_path):
+        return hashlib.sha256(memoryview(pdf_path)).hexdigest()
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PageTextCache:
+    """Extracted page text keyed by (namespace, file hash, page index).
+
+    Lookups go through a bounded in-memory LRU first, then a directory
+    of plain text files, so identical uploads are parsed only once.
+    """
+    def __init__(self, cache_dir, max_entries):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._memory = LRUCache(max_entries)
+        # Guards the disk tier's counters; the memory tier counts its own hits
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, namespace, file_hash, key):
+        """Return the cached text for a page, or None on a miss"""
+        memory_key = (namespace, file_hash, key)
+        text = self._memory.get(memory_key)
+        if text is not None:
+            return text
+
+        path = self._path(namespace, file_hash, key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                text = file.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+        self._memory.put(memory_key, text)
+        return text
+
+    def put(self, namespace, file_hash, key, text):
+        """Store page text in both tiers"""
+        self._memory.put((namespace, file_hash, key), text)
+
+        path = self._path(namespace, file_hash, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                file.write(text)
+            os.replace(temp_path, path)
+        except OSError:
+            # The disk tier is best-effort; the memory tier still holds the entry
+            pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'memory_hits': self._memory.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_entries': len(self._memory),
+            }
+
+    def clear_memory(self):
+        self._memory.clear()
+
+    def _path(self, namespace, file_hash, key):
+        return os.path.join(self.cache_dir, namespace, file_hash[:2], file_hash, f"{key}.txt")
+
+
+@process_singleton
+def get_page_cache():
+    """Process-wide cache shared by every PDFProcessor, so Streamlit reruns reuse it"""
+    config = Config()
+    return PageTextCache(os.path.join(config.CACHE_FOLDER, 'pages'), config.PAGE_CACHE_SIZE)
@@ -53,4 +53,3 @@ class TextHumanizer:
             text = re.sub(rf'\\b{formal}\\b', informal, text, flags=re.IGNORECASE)
         
         return text
-EOL
\ No newline at end of file
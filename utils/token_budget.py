@@ -0,0 +1,154 @@
+import os
+import re
+from collections import namedtuple
+
+from config import Config
+from utils.lru import process_singleton
+from utils.retrieval import BM25Index, Chunk, PARAGRAPH_BREAK
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:
+    Tokenizer = None
+
+# Fallback estimate: every run of up to four word characters, and every
+# punctuation mark, counts as one token. BPE vocabularies split text at
+# least this finely for ordinary prose, so the estimate errs on the high side.
+APPROXIMATE_TOKEN = re.compile(r'\w{1,4}|[^\w\s]')
+
+# Cost of the blank line joining two context sections
+SEPARATOR_TOKENS = 1
+
+
+class ContextPacking(namedtuple('ContextPacking', [
+    'budget', 'context_tokens', 'kept_tokens', 'sections', 'dropped_sections', 'truncated', 'exact'
+])):
+    """Outcome of fitting a context into the prompt budget.
+
+    budget is what the context was allowed, context_tokens and sections
+    describe the context as given, kept_tokens what was actually sent.
+    truncated means the last remaining section was cut short; exact means
+    the counts came from the model tokenizer rather than the estimate.
+    """
+    __slots__ = ()
+
+    @property
+    def trimmed(self):
+        return self.dropped_sections > 0 or self.truncated
+
+
+class TokenCounter:
+    """Counts tokens with a `tokenizers` tokenizer when given one, otherwise estimates"""
+    def __init__(self, tokenizer=None):
+        self.tokenizer = tokenizer
+
+    @property
+    def exact(self):
+        return self.tokenizer is not None
+
+    def count(self, text):
+        if not text:
+            return 0
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+        return len(APPROXIMATE_TOKEN.findall(text))
+
+    def truncate(self, text, max_tokens):
+        """Longest prefix of text that fits in max_tokens"""
+        if max_tokens <= 0:
+            return ""
+        if self.tokenizer is not None:
+            offsets = self.tokenizer.encode(text, add_special_tokens=False).offsets
+            if len(offsets) <= max_tokens:
+                return text
+            return text[:offsets[max_tokens - 1][1]]
+        for position, match in enumerate(APPROXIMATE_TOKEN.finditer(text)):
+            if position == max_tokens:
+                return text[:match.start()].rstrip()
+        return text
+
+
+def load_tokenizer(name):
+    """Tokenizer from a tokenizer.json path or a Hugging Face Hub id, or None if unavailable"""
+    if not name or Tokenizer is None:
+        return None
+    try:
+        if os.path.isfile(name):
+            return Tokenizer.from_file(name)
+        return Tokenizer.from_pretrained(name)
+    except Exception:
+        return None
+
+
+class TokenBudget:
+    """Prompt budget for one model: its context window minus the room reserved for the answer"""
+    def __init__(self, counter, context_tokens, max_new_tokens):
+        self.counter = counter
+        self.context_tokens = context_tokens
+        self.max_new_tokens = max_new_tokens
+
+    @classmethod
+    def from_config(cls):
+        config = Config()
+        return cls(get_token_counter(), config.LLM_CONTEXT_TOKENS, config.LLM_MAX_NEW_TOKENS)
+
+    def available(self, fixed_text):
+        """Tokens left for context once fixed_text and the answer are accounted for"""
+        return self.context_tokens - self.max_new_tokens - self.counter.count(fixed_text)
+
+    def cost(self, context_text):
+        """Tokens context_text takes up once packed: its sections and the breaks joining them"""
+        return sum(
+            self.counter.count(section) + SEPARATOR_TOKENS
+            for section in PARAGRAPH_BREAK.split(context_text) if section.strip()
+        )
+
+    def pack(self, context_text, query, fixed_text):
+        """Fit context_text next to fixed_text, returning (packed_text, ContextPacking).
+
+        The context is split into its blank-line separated sections (the
+        per-page chunks of format_context()). While it is over budget, the
+        section scoring lowest against query under BM25 is dropped, later
+        sections before earlier ones on ties. A single section that still
+        does not fit is cut short.
+        """
+        budget = self.available(fixed_text)
+        sections = [section for section in PARAGRAPH_BREAK.split(context_text) if section.strip()]
+        costs = [self.cost(section) for section in sections]
+        context_tokens = sum(costs)
+
+        keep = set(range(len(sections)))
+        used = context_tokens
+        if used > budget:
+            scores = BM25Index([Chunk(i, section) for i, section in enumerate(sections)]).scores(query)
+            for i in sorted(keep, key=lambda i: (scores[i], -i)):
+                if used <= budget or (len(keep) == 1 and budget > 0):
+                    break
+                keep.discard(i)
+                used -= costs[i]
+
+        kept = [sections[i] for i in sorted(keep)]
+        truncated = False
+        if kept and used > budget:
+            kept = [self.counter.truncate(kept[0], budget - SEPARATOR_TOKENS)]
+            used = self.counter.count(kept[0]) + SEPARATOR_TOKENS
+            truncated = True
+
+        packing = ContextPacking(
+            budget=max(budget, 0),
+            context_tokens=context_tokens,
+            kept_tokens=used,
+            sections=len(sections),
+            dropped_sections=len(sections) - len(keep),
+            truncated=truncated,
+            exact=self.counter.exact
+        )
+        if not packing.trimmed:
+            return context_text, packing
+        return "\n\n".join(kept), packing
+
+
+@process_singleton
+def get_token_counter():
+    """Process-wide counter for LLM_TOKENIZER, falling back to the estimate"""
+    return TokenCounter(load_tokenizer(Config().LLM_TOKENIZER))